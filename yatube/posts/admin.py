@@ -1,11 +1,30 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 
-from .models import Comment, Follow, Group, Post
+from .deletion import soft_delete, soft_delete_user
+from .models import (Comment, DigestEvent, Follow, Group, Post,
+                     Recommendation, User)
+
+
+class SoftDeleteAdmin(admin.ModelAdmin):
+    """
+    Удаление из админки мягкое: запись скрывается, а строки удаляет
+    команда purge_deleted.
+    """
+
+    def delete_model(self, request, obj):
+        soft_delete(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            soft_delete(obj)
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(SoftDeleteAdmin):
     list_display = ['pk', 'text', 'pub_date', 'author', 'group']
+    # Считаются при сохранении текста
+    exclude = ['text_html', 'text_html_version', 'text_edited_at']
     search_fields = ['text']
     list_filter = ['pub_date']
     empty_value_display = '-пусто-'
@@ -20,8 +39,9 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SoftDeleteAdmin):
     list_display = ['pk', 'post', 'author', 'text', 'created']
+    exclude = ['text_html', 'text_html_version']
     search_fields = ['post', 'author', 'text']
     list_filter = ['created']
     empty_value_display = '-пусто-'
@@ -31,3 +51,33 @@ class CommentAdmin(admin.ModelAdmin):
 class FollowAdmin(admin.ModelAdmin):
     list_display = ['pk', 'user', 'author']
     empty_value_display = '-пусто-'
+
+
+@admin.register(DigestEvent)
+class DigestEventAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'recipient', 'kind', 'post', 'comment', 'created']
+    list_filter = ['kind']
+    empty_value_display = '-пусто-'
+
+
+@admin.register(Recommendation)
+class RecommendationAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'user', 'recommended', 'score', 'created']
+    empty_value_display = '-пусто-'
+
+
+class SoftDeleteUserAdmin(UserAdmin):
+    """
+    Пользователь из админки удаляется мягко, как через soft_delete_user.
+    """
+
+    def delete_model(self, request, obj):
+        soft_delete_user(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            soft_delete_user(user)
+
+
+admin.site.unregister(User)
+admin.site.register(User, SoftDeleteUserAdmin)
@@ -0,0 +1,113 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DateField, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import AuthorArchiveMonth, GroupArchiveMonth, Post
+from .upsert import upsert
+
+
+def author_key(author_id):
+    return f'archive:author:{author_id}'
+
+
+def group_key(group_id):
+    return f'archive:group:{group_id}'
+
+
+def month_start(moment):
+    """
+    Первый день месяца, к которому относится момент, в часовом
+    поясе сайта.
+    """
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def month_range(year, month):
+    """
+    Границы месяца [start, end) для выборки по pub_date.
+    Для несуществующего месяца бросает ValueError.
+    """
+    start = datetime.datetime(year, month, 1)
+    if month == 12:
+        end = start.replace(year=year + 1, month=1)
+    else:
+        end = start.replace(month=month + 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def _adjust(model, lookup, delta):
+    upsert(
+        model, lookup, {'post_count': F('post_count') + delta},
+        {'post_count': delta} if delta > 0 else None
+    )
+    if delta < 0:
+        model.objects.filter(post_count__lte=0, **lookup).delete()
+
+
+def adjust_author_month(author_id, pub_date, delta):
+    _adjust(
+        AuthorArchiveMonth,
+        {'author_id': author_id, 'month': month_start(pub_date)},
+        delta
+    )
+    cache.delete(author_key(author_id))
+
+
+def adjust_group_month(group_id, pub_date, delta):
+    _adjust(
+        GroupArchiveMonth,
+        {'group_id': group_id, 'month': month_start(pub_date)},
+        delta
+    )
+    cache.delete(group_key(group_id))
+
+
+def rebuild_group_months(group_id):
+    """
+    Пересчитывает месяцы сообщества целиком, когда из него разом
+    пропало много постов.
+    """
+    month = TruncMonth('pub_date', output_field=DateField())
+    rows = (
+        Post.objects.filter(group_id=group_id)
+                    .annotate(month=month)
+                    .values('month')
+                    .annotate(post_count=Count('pk'))
+                    .order_by()
+    )
+    with transaction.atomic():
+        GroupArchiveMonth.objects.filter(group_id=group_id).delete()
+        GroupArchiveMonth.objects.bulk_create(
+            GroupArchiveMonth(group_id=group_id, **row) for row in rows
+        )
+    cache.delete(group_key(group_id))
+
+
+def _get_months(key, queryset):
+    months = cache.get(key)
+    if months is None:
+        months = list(queryset.values_list('month', 'post_count'))
+        cache.set(key, months, settings.ARCHIVE_CACHE_TIMEOUT)
+    return months
+
+
+def get_author_months(author_id):
+    """
+    Месяцы с постами автора и число постов в каждом, новые первыми.
+    """
+    return _get_months(
+        author_key(author_id),
+        AuthorArchiveMonth.objects.filter(author_id=author_id)
+    )
+
+
+def get_group_months(group_id):
+    return _get_months(
+        group_key(group_id),
+        GroupArchiveMonth.objects.filter(group_id=group_id)
+    )
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Бэкенды, у которых свой кэш в каждом процессе
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Версии тегов кэша страниц, графа подписок, списков сообществ и
+    архива сбрасываются через кэш. С кэшем в памяти процесса сброс
+    видит только тот воркер, который его сделал.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        f'Кэш {backend} не общий для процессов сервера.',
+        hint=(
+            'Укажите в CACHES["default"] общий бэкенд: Memcached, '
+            'Redis или FileBasedCache для одного сервера.'
+        ),
+        id='posts.E001',
+    )]
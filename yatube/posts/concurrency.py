@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from yatube.replicas import get_read_alias, use_read_alias
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Общий ограниченный пул потоков для блокирующих запросов к БД.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.QUERY_POOL_SIZE,
+                thread_name_prefix='yatube-query'
+            )
+    return _executor
+
+
+def _execute_wrappers():
+    """
+    Обёртки запросов текущего потока, например замер времени базы
+    из защиты от перегрузки, чтобы поставить их и в потоке пула.
+    """
+    return [
+        (alias, wrapper)
+        for alias in connections
+        for wrapper in connections[alias].execute_wrappers
+    ]
+
+
+def _run_and_release(func, read_alias, wrappers):
+    # У каждого потока пула своё постоянное соединение. Как и в начале
+    # и конце запроса, закрываем только сломанные и старше CONN_MAX_AGE,
+    # иначе каждая задача открывала бы соединение заново.
+    close_old_connections()
+    try:
+        # Поток пула читает из той же базы, что и поток запроса,
+        # и его запросы учитываются теми же обёртками
+        with ExitStack() as stack:
+            stack.enter_context(use_read_alias(read_alias))
+            for alias, wrapper in wrappers:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(wrapper)
+                )
+            return func()
+    finally:
+        close_old_connections()
+
+
+def run_concurrently(*funcs):
+    """
+    Выполняет независимые функции параллельно в пуле потоков
+    и возвращает их результаты в исходном порядке.
+
+    При выключенном CONCURRENT_QUERIES функции выполняются по очереди
+    в текущем потоке.
+    """
+    if not settings.CONCURRENT_QUERIES or len(funcs) < 2:
+        return [func() for func in funcs]
+    executor = get_executor()
+    read_alias = get_read_alias()
+    wrappers = _execute_wrappers()
+    futures = [
+        executor.submit(_run_and_release, func, read_alias, wrappers)
+        for func in funcs[1:]
+    ]
+    first = funcs[0]()
+    return [first] + [future.result() for future in futures]
@@ -0,0 +1,140 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import CASCADE, Q
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+from yatube.response_cache import purge_tags
+
+from .archive import author_key, rebuild_group_months
+from .groups import refresh_group_stats
+from .models import (AuthorArchiveMonth, Comment, Follow, Post,
+                     Recommendation, User, UserDeletion)
+
+
+def soft_delete(instance):
+    """
+    Скрывает пост или комментарий, а вместе с постом — комментарии
+    к нему. Сигналы post_save обновляют счётчики так же, как при
+    удалении, а строка удаляется насовсем позже командой purge_deleted.
+    """
+    instance.deleted_at = timezone.now()
+    with transaction.atomic():
+        instance.save(update_fields=['deleted_at'])
+        if isinstance(instance, Post):
+            Comment.objects.filter(post=instance).update(
+                deleted_at=instance.deleted_at
+            )
+
+
+def soft_delete_user(user):
+    """
+    Отключает пользователя и скрывает все его посты, комментарии
+    и комментарии к его постам несколькими UPDATE, не загружая строки.
+
+    Подписки удаляются сразу: счётчики подписчиков и граф подписок
+    не должны учитывать удалённого. Их сбрасывают сигналы удаления
+    Follow.
+    """
+    now = timezone.now()
+    posts = Post.objects.filter(author=user)
+    group_ids = set(
+        posts.filter(group__isnull=False)
+             .order_by()
+             .values_list('group_id', flat=True)
+             .distinct()
+    )
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        UserDeletion.objects.get_or_create(user=user)
+        posts.update(deleted_at=now)
+        Comment.objects.filter(
+            Q(author=user) | Q(post__author=user)
+        ).update(deleted_at=now)
+        Follow.objects.filter(Q(user=user) | Q(author=user)).delete()
+        AuthorArchiveMonth.objects.filter(author=user).delete()
+        Recommendation.objects.filter(recommended=user).delete()
+    user.is_active = False
+    cache.delete(author_key(user.pk))
+    for group_id in group_ids:
+        refresh_group_stats(group_id)
+        rebuild_group_months(group_id)
+    purge_tags(
+        'feed',
+        f'author:{user.pk}',
+        *(f'group:{group_id}' for group_id in group_ids)
+    )
+
+
+def _cascades(model):
+    # Те же связи, что обходит сборщик Django, включая скрытые
+    # related_name='+' и промежуточные таблицы ManyToMany
+    return [
+        relation
+        for relation in get_candidate_relations_to_delete(model._meta)
+        if relation.on_delete is CASCADE
+    ]
+
+
+def purge(queryset, batch_size=None, progress=None):
+    """
+    Удаляет насовсем записи queryset и всё, что ссылается на них
+    с CASCADE, пачками по batch_size.
+
+    Зависимые строки каждой пачки удаляются раньше самой пачки, а связи
+    один к одному — в той же транзакции, поэтому сборщик Django не
+    находит что загружать, а одна транзакция удаляет не больше
+    batch_size строк одной таблицы. После каждой пачки
+    вызывается progress(model, count). Возвращает число удалённых строк.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    model = queryset.model
+    total = 0
+    while True:
+        ids = list(
+            queryset.order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        dependents = [
+            (relation, relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': ids}
+            ))
+            for relation in _cascades(model)
+        ]
+        for relation, rows in dependents:
+            if not relation.one_to_one:
+                total += purge(rows, batch_size, progress)
+        with transaction.atomic():
+            # Строк один к одному не больше, чем в пачке: удаляем их
+            # вместе с ней, чтобы отметка вроде UserDeletion не пропала
+            # раньше самой записи
+            for relation, rows in dependents:
+                if relation.one_to_one:
+                    total += purge(rows, batch_size, progress)
+            model._base_manager.filter(pk__in=ids).delete()
+        total += len(ids)
+        if progress is not None:
+            progress(model, len(ids))
+
+
+def purge_deleted(retention=None, batch_size=None, progress=None):
+    """
+    Удаляет насовсем пользователей, посты и комментарии, удалённые
+    мягко больше retention секунд назад. Возвращает число удалённых
+    строк по видам вместе с зависимыми.
+    """
+    if retention is None:
+        retention = settings.SOFT_DELETE_RETENTION
+    cutoff = timezone.now() - timedelta(seconds=retention)
+    querysets = {
+        'users': User.objects.filter(deletion__deleted_at__lte=cutoff),
+        'posts': Post.all_objects.filter(deleted_at__lte=cutoff),
+        'comments': Comment.all_objects.filter(deleted_at__lte=cutoff),
+    }
+    return {
+        kind: purge(queryset, batch_size, progress)
+        for kind, queryset in querysets.items()
+    }
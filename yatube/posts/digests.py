@@ -0,0 +1,136 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Max
+from django.template.loader import render_to_string
+
+from .models import Comment, DigestEvent, Follow, Post, User
+
+
+def fan_out_post(post_id, batch_size=None):
+    """
+    Создаёт событие о новом посте для каждого подписчика автора.
+
+    Подписчики перебираются пачками по user_id, поэтому память не зависит
+    от их числа. При повторном запуске обход продолжается с последнего
+    уже записанного получателя.
+    """
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    post = Post.objects.filter(pk=post_id).only('author_id').first()
+    if post is None:
+        return 0
+    last_id = DigestEvent.objects.filter(
+        post_id=post_id, kind=DigestEvent.POST
+    ).aggregate(last=Max('recipient_id'))['last'] or 0
+    created = 0
+    while True:
+        followers = Follow.objects.filter(
+            author_id=post.author_id,
+            user_id__gt=last_id,
+            user__is_active=True
+        ).order_by('user_id')
+        follower_ids = list(
+            followers.values_list('user_id', flat=True)[:batch_size]
+        )
+        if not follower_ids:
+            return created
+        DigestEvent.objects.bulk_create(
+            DigestEvent(
+                recipient_id=user_id, kind=DigestEvent.POST, post_id=post_id
+            )
+            for user_id in follower_ids
+        )
+        created += len(follower_ids)
+        last_id = follower_ids[-1]
+
+
+def add_comment_event(comment_id):
+    """
+    Сообщает автору поста о новом комментарии, если это не его
+    собственный комментарий.
+    """
+    comment = Comment.objects.select_related('post').filter(
+        pk=comment_id
+    ).first()
+    if comment is None or comment.author_id == comment.post.author_id:
+        return
+    DigestEvent.objects.create(
+        recipient_id=comment.post.author_id,
+        kind=DigestEvent.COMMENT,
+        post_id=comment.post_id,
+        comment_id=comment.pk
+    )
+
+
+def build_message(recipient, events, total):
+    body = render_to_string('posts/email/digest.txt', {
+        'recipient': recipient,
+        'events': events,
+        'more': total - len(events),
+    })
+    return EmailMessage(
+        subject=settings.DIGEST_SUBJECT,
+        body=body,
+        to=[recipient.email],
+    )
+
+
+def send_digests(batch_size=None, connection=None):
+    """
+    Отправляет накопленные события одним письмом на получателя.
+    Отключённым пользователям письма не отправляются, а их события
+    удаляются вместе с остальными.
+
+    Получатели обрабатываются пачками через одно соединение с почтовым
+    сервером; события пачки удаляются сразу после отправки, так что
+    прерванная рассылка продолжается со следующей пачки.
+    """
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    connection = connection or get_connection()
+    sent = 0
+    last_id = 0
+    with connection:
+        while True:
+            recipient_ids = list(
+                DigestEvent.objects.filter(recipient_id__gt=last_id)
+                                   .order_by('recipient_id')
+                                   .values_list('recipient_id', flat=True)
+                                   .distinct()[:batch_size]
+            )
+            if not recipient_ids:
+                return sent
+            last_id = recipient_ids[-1]
+            pending = DigestEvent.objects.filter(
+                recipient_id__in=recipient_ids
+            )
+            # События всей пачки одним запросом; на письмо идут первые
+            # DIGEST_MAX_ITEMS, остальные только считаются
+            events = {}
+            totals = Counter()
+            max_event_id = 0
+            rows = (
+                pending.select_related('post__author', 'comment__author')
+                       .order_by('recipient_id', 'pk')
+                       .iterator()
+            )
+            for event in rows:
+                totals[event.recipient_id] += 1
+                shown = events.setdefault(event.recipient_id, [])
+                if len(shown) < settings.DIGEST_MAX_ITEMS:
+                    shown.append(event)
+                max_event_id = max(max_event_id, event.pk)
+            recipients = User.objects.filter(is_active=True).in_bulk(
+                recipient_ids
+            )
+            messages = [
+                build_message(
+                    recipient, events[recipient_id], totals[recipient_id]
+                )
+                for recipient_id, recipient in sorted(recipients.items())
+                if recipient.email and recipient_id in events
+            ]
+            if messages:
+                sent += connection.send_messages(messages) or 0
+            # События, появившиеся во время отправки, уйдут в следующий раз
+            pending.filter(pk__lte=max_event_id).delete()
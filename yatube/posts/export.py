@@ -0,0 +1,112 @@
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Post
+
+FORMATS = ('csv', 'ndjson')
+
+# Что выгружается: модель, поля для values_list (id первым — по нему
+# идёт выборка пачками) и фильтры по пользователю и сообществу
+EXPORTS = {
+    'posts': (
+        Post,
+        ('id', 'author__username', 'group__slug', 'pub_date', 'text'),
+        {'user': 'author__username', 'group': 'group__slug'},
+    ),
+    'comments': (
+        Comment,
+        ('id', 'post_id', 'author__username', 'created', 'text'),
+        {'user': 'author__username', 'group': 'post__group__slug'},
+    ),
+    'follows': (
+        Follow,
+        ('id', 'user__username', 'author__username'),
+        {'user': 'user__username'},
+    ),
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def get_export(kind, user=None, group=None):
+    """
+    Queryset и поля выгрузки kind с фильтрами по пользователю
+    и сообществу.
+    """
+    if kind not in EXPORTS:
+        raise ExportError(f'Неизвестная выгрузка: {kind}')
+    model, fields, lookups = EXPORTS[kind]
+    queryset = model.objects.all()
+    for name, value in (('user', user), ('group', group)):
+        if value is None:
+            continue
+        if name not in lookups:
+            raise ExportError(f'Выгрузка {kind} без фильтра {name}')
+        queryset = queryset.filter(**{lookups[name]: value})
+    return queryset, fields
+
+
+def iter_batches(queryset, fields, batch_size=None):
+    """
+    Строки выгрузки пачками по batch_size.
+
+    Пачки выбираются по индексу первичного ключа после последнего
+    выданного id, без OFFSET и без создания объектов моделей, поэтому
+    память не зависит от размера таблицы.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    queryset = queryset.order_by('pk')
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_id).values_list(*fields)[:batch_size]
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+class Echo:
+    """
+    «Файл» для csv.writer, который просто возвращает записанную строку.
+    """
+
+    def write(self, value):
+        return value
+
+
+def render_batches(batches, fields, fmt):
+    """
+    Текст выгрузки частями: одна часть на пачку строк.
+    """
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for rows in batches:
+            yield ''.join(writer.writerow(row) for row in rows)
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for rows in batches:
+            yield ''.join(
+                encoder.encode(dict(zip(fields, row))) + '\n'
+                for row in rows
+            )
+
+
+def export_chunks(kind, fmt, user=None, group=None, batch_size=None):
+    """
+    Выгрузка в байтах частями, готовая для потокового ответа или файла.
+    Ошибки в параметрах видны сразу, а не при чтении первой части.
+    """
+    if fmt not in FORMATS:
+        raise ExportError(f'Неизвестный формат: {fmt}')
+    queryset, fields = get_export(kind, user, group)
+    batches = iter_batches(queryset, fields, batch_size)
+    return (
+        text.encode() for text in render_batches(batches, fields, fmt)
+    )
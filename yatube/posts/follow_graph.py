@@ -0,0 +1,192 @@
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow
+
+VERSION_KEY = 'follow_graph:version'
+
+_EMPTY = array('I')
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def _insert(adjacency, key, value):
+    ids = adjacency.setdefault(key, array('I'))
+    index = bisect_left(ids, value)
+    if index == len(ids) or ids[index] != value:
+        ids.insert(index, value)
+
+
+def _remove(adjacency, key, value):
+    ids = adjacency.get(key)
+    if ids is None:
+        return
+    index = bisect_left(ids, value)
+    if index < len(ids) and ids[index] == value:
+        del ids[index]
+        if not ids:
+            del adjacency[key]
+
+
+def intersect(left, right):
+    """
+    Пересечение двух отсортированных массивов id слиянием.
+    """
+    if len(left) > len(right):
+        left, right = right, left
+    if len(left) * 16 < len(right):
+        # Короткий массив выгоднее искать двоичным поиском в длинном
+        return [value for value in left if _contains(right, value)]
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] == right[j]:
+            result.append(left[i])
+            i += 1
+            j += 1
+        elif left[i] < right[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class FollowGraph:
+    """
+    Граф подписок в памяти процесса: для каждого пользователя
+    отсортированные массивы id тех, на кого он подписан, и подписчиков.
+    """
+
+    def __init__(self, following=None, followers=None):
+        self._following = following or {}
+        self._followers = followers or {}
+        self._lock = threading.Lock()
+        self.built_at = time.monotonic()
+        self.version = None
+
+    @classmethod
+    def from_edges(cls, edges):
+        """
+        Строит граф из пар (подписчик, автор), отсортированных
+        по подписчику.
+        """
+        following = {}
+        followers = {}
+        for user_id, author_id in edges:
+            following.setdefault(user_id, array('I')).append(author_id)
+            followers.setdefault(author_id, array('I')).append(user_id)
+        for adjacency in (following, followers):
+            for key, ids in adjacency.items():
+                adjacency[key] = array('I', sorted(ids))
+        return cls(following, followers)
+
+    @classmethod
+    def from_database(cls):
+        edges = (
+            Follow.objects.order_by('user_id', 'author_id')
+                          .values_list('user_id', 'author_id')
+                          .iterator(chunk_size=10000)
+        )
+        return cls.from_edges(edges)
+
+    def add(self, user_id, author_id):
+        with self._lock:
+            _insert(self._following, user_id, author_id)
+            _insert(self._followers, author_id, user_id)
+
+    def remove(self, user_id, author_id):
+        with self._lock:
+            _remove(self._following, user_id, author_id)
+            _remove(self._followers, author_id, user_id)
+
+    def following(self, user_id):
+        return self._following.get(user_id, _EMPTY)
+
+    def followers(self, user_id):
+        return self._followers.get(user_id, _EMPTY)
+
+    def following_count(self, user_id):
+        return len(self.following(user_id))
+
+    def followers_count(self, user_id):
+        return len(self.followers(user_id))
+
+    def is_following(self, user_id, author_id):
+        return _contains(self.following(user_id), author_id)
+
+    def common_following(self, user_id, other_id):
+        return intersect(self.following(user_id), self.following(other_id))
+
+    def common_followers(self, user_id, other_id):
+        return intersect(self.followers(user_id), self.followers(other_id))
+
+    def mutual(self, user_id):
+        """
+        Пользователи, с которыми user_id подписан взаимно.
+        """
+        return intersect(self.following(user_id), self.followers(user_id))
+
+    @property
+    def edge_count(self):
+        return sum(len(ids) for ids in self._following.values())
+
+    def memory_usage(self):
+        """
+        Примерный объём памяти графа в байтах.
+        """
+        total = 0
+        for adjacency in (self._following, self._followers):
+            total += sys.getsizeof(adjacency)
+            total += sum(sys.getsizeof(ids) for ids in adjacency.values())
+        return total
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_follow_graph():
+    """
+    Граф текущего процесса. Строится при первом обращении и заново,
+    если он старше FOLLOW_GRAPH_MAX_AGE или команда rebuild_follow_graph
+    сменила версию в кэше. Подписки и отписки в этом процессе сигналы
+    вносят в уже построенный граф сразу.
+    """
+    global _graph
+    version = cache.get(VERSION_KEY)
+    graph = _graph
+    if (
+        graph is None
+        or graph.version != version
+        or time.monotonic() - graph.built_at > settings.FOLLOW_GRAPH_MAX_AGE
+    ):
+        with _graph_lock:
+            if _graph is graph:
+                graph = FollowGraph.from_database()
+                graph.version = version
+                _graph = graph
+            graph = _graph
+    return graph
+
+
+def get_built_graph():
+    """
+    Граф, если он уже построен в этом процессе, иначе None.
+    """
+    return _graph
+
+
+def request_rebuild():
+    """
+    Сообщает всем процессам с общим кэшем, что граф нужно перестроить.
+    """
+    cache.set(VERSION_KEY, time.time(), None)
@@ -0,0 +1,103 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Follow, User
+
+FollowState = namedtuple(
+    'FollowState', ['is_following', 'followers_count', 'following_count']
+)
+
+
+def counts_key(user_id):
+    return f'follow_counts:{user_id}'
+
+
+def pair_key(viewer_id, author_id):
+    return f'follow_pair:{viewer_id}:{author_id}'
+
+
+def _count_subquery(**filters):
+    queryset = (
+        Follow.objects.filter(**filters)
+                      .order_by()
+                      .values(*filters)
+                      .annotate(total=Count('pk'))
+                      .values('total')
+    )
+    return Coalesce(Subquery(queryset, output_field=IntegerField()), 0)
+
+
+def _load_states(viewer_id, author_ids):
+    queryset = User.objects.filter(pk__in=author_ids).annotate(
+        followers_count=_count_subquery(author=OuterRef('pk')),
+        following_count=_count_subquery(user=OuterRef('pk')),
+    )
+    fields = ['pk', 'followers_count', 'following_count']
+    if viewer_id is not None:
+        queryset = queryset.annotate(is_following=Exists(
+            Follow.objects.filter(user_id=viewer_id, author=OuterRef('pk'))
+        ))
+        fields.append('is_following')
+    return {row[0]: row[1:] for row in queryset.values_list(*fields)}
+
+
+def get_follow_states(viewer_id, author_ids):
+    """
+    Состояние подписки viewer на каждого из авторов и число подписчиков
+    и подписок авторов: из кэша, а для промахов — одним запросом.
+
+    viewer_id=None означает анонимного посетителя.
+    """
+    author_ids = list(author_ids)
+    keys = {author_id: counts_key(author_id) for author_id in author_ids}
+    if viewer_id is not None:
+        keys.update({
+            (author_id, 'pair'): pair_key(viewer_id, author_id)
+            for author_id in author_ids
+        })
+    cached = cache.get_many(keys.values())
+
+    missing = [
+        author_id for author_id in author_ids
+        if keys[author_id] not in cached or (
+            viewer_id is not None
+            and keys[(author_id, 'pair')] not in cached
+        )
+    ]
+    if missing:
+        loaded = {}
+        for author_id, row in _load_states(viewer_id, missing).items():
+            loaded[keys[author_id]] = row[:2]
+            if viewer_id is not None:
+                loaded[keys[(author_id, 'pair')]] = row[2]
+        cache.set_many(loaded, settings.FOLLOW_STATE_CACHE_TIMEOUT)
+        cached.update(loaded)
+
+    states = {}
+    for author_id in author_ids:
+        if keys[author_id] not in cached:
+            continue
+        followers_count, following_count = cached[keys[author_id]]
+        is_following = (
+            viewer_id is not None and cached[keys[(author_id, 'pair')]]
+        )
+        states[author_id] = FollowState(
+            is_following, followers_count, following_count
+        )
+    return states
+
+
+def get_follow_state(viewer_id, author_id):
+    return get_follow_states(viewer_id, [author_id])[author_id]
+
+
+def invalidate_follow_state(user_id, author_id):
+    cache.delete_many([
+        counts_key(user_id),
+        counts_key(author_id),
+        pair_key(user_id, author_id),
+    ])
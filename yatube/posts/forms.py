@@ -1,9 +1,51 @@
 from django import forms
+from django.conf import settings
+from django.forms.models import ModelChoiceIterator
+from django.urls import reverse_lazy
 
 from . import models
+from .groups import count_groups, get_group_choices
 from .validators import validate_not_empty
 
 
+class CachedGroupChoiceIterator(ModelChoiceIterator):
+    """
+    Варианты выбора сообщества из кэша вместо запроса всех групп
+    при каждом рендере формы.
+    """
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        yield from get_group_choices()
+
+    def __len__(self):
+        return len(get_group_choices()) + (
+            self.field.empty_label is not None
+        )
+
+
+class GroupAutocompleteWidget(forms.TextInput):
+    """
+    Поиск сообщества по началу названия вместо списка всех групп.
+    В форму уходит id из скрытого поля, как и у обычного select.
+    """
+    template_name = 'posts/widgets/group_autocomplete.html'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        title = ''
+        if value:
+            title = models.Group.objects.filter(pk=value).values_list(
+                'title', flat=True
+            ).first() or ''
+        context['widget'].update({
+            'title': title,
+            'url': reverse_lazy('posts:groups_autocomplete'),
+        })
+        return context
+
+
 class PostForm(forms.ModelForm):
     text = forms.CharField(
         label='Текст поста',
@@ -18,11 +60,24 @@ class PostForm(forms.ModelForm):
         empty_label='',
         required=False
     )
+    group.iterator = CachedGroupChoiceIterator
 
     class Meta:
         model = models.Post
         fields = ['text', 'group', 'image']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if count_groups() > settings.GROUP_SELECT_LIMIT:
+            self.fields['group'].widget = GroupAutocompleteWidget()
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        # Сообщество уже найдено полем формы, вторая проверка
+        # внешнего ключа моделью повторила бы тот же запрос
+        exclude.append('group')
+        return exclude
+
 
 class CommentForm(forms.ModelForm):
     text = forms.CharField(
@@ -0,0 +1,153 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (Case, Count, DateTimeField, F, Max, Q, Subquery,
+                              Value, When)
+
+from .models import Group, GroupStats, Post
+from .upsert import upsert
+
+VERSION_CACHE_KEY = 'groups:version'
+DIRECTORY_CACHE_KEY = 'groups:directory'
+
+# Верхняя граница для поиска по префиксу диапазоном индекса
+PREFIX_END = '\U0010ffff'
+
+
+def adjust_group_stats(group_id, post, delta):
+    """
+    Добавляет пост в счётчики сообщества (delta=1) или убирает из них
+    (delta=-1) одним UPDATE, без пересчёта всех постов.
+
+    Автор учитывается, только если других его постов в сообществе нет.
+    Дата последнего поста выбирается заново по индексу, лишь когда
+    убран самый новый пост.
+    """
+    posts = Post.objects.filter(group_id=group_id)
+    changes = {'post_count': F('post_count') + delta}
+    others = posts.filter(author_id=post.author_id).exclude(pk=post.pk)
+    if not others.exists():
+        changes['author_count'] = F('author_count') + delta
+    defaults = None
+    if delta > 0:
+        changes['last_post_at'] = Case(
+            When(last_post_at__gte=post.pub_date, then=F('last_post_at')),
+            default=Value(post.pub_date, output_field=DateTimeField())
+        )
+        defaults = {
+            'post_count': 1,
+            'author_count': 1,
+            'last_post_at': post.pub_date,
+        }
+    else:
+        latest = posts.order_by('-pub_date').values('pub_date')[:1]
+        changes['last_post_at'] = Case(
+            When(last_post_at=post.pub_date, then=Subquery(latest)),
+            default=F('last_post_at')
+        )
+    upsert(GroupStats, {'group_id': group_id}, changes, defaults)
+    cache.delete(DIRECTORY_CACHE_KEY)
+
+
+def refresh_group_stats(group_id):
+    """
+    Пересчитывает счётчики одного сообщества по индексу group_id,
+    когда из него разом пропало много постов.
+    """
+    stats = Post.objects.filter(group_id=group_id).aggregate(
+        post_count=Count('pk'),
+        author_count=Count('author', distinct=True),
+        last_post_at=Max('pub_date'),
+    )
+    if Group.objects.filter(pk=group_id).exists():
+        GroupStats.objects.update_or_create(group_id=group_id, defaults=stats)
+    cache.delete(DIRECTORY_CACHE_KEY)
+
+
+def get_directory():
+    """
+    Все сообщества со счётчиками, самые активные первыми.
+    """
+    directory = cache.get(DIRECTORY_CACHE_KEY)
+    if directory is None:
+        directory = list(
+            Group.objects.select_related('stats')
+                         .order_by('-stats__post_count', 'title')
+        )
+        cache.set(
+            DIRECTORY_CACHE_KEY, directory, settings.GROUPS_CACHE_TIMEOUT
+        )
+    return directory
+
+
+def get_groups_version():
+    """
+    Версия списка сообществ: меняется при любом изменении Group, и все
+    ключи кэша со старой версией перестают читаться.
+    """
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, 1, None)
+        version = cache.get(VERSION_CACHE_KEY, 1)
+    return version
+
+
+def get_group_choices():
+    """
+    Пары (id, название) для поля выбора сообщества.
+    """
+    key = f'groups:choices:{get_groups_version()}'
+    choices = cache.get(key)
+    if choices is None:
+        choices = list(
+            Group.objects.order_by('title').values_list('pk', 'title')
+        )
+        cache.set(key, choices, settings.GROUPS_CACHE_TIMEOUT)
+    return choices
+
+
+def count_groups():
+    key = f'groups:count:{get_groups_version()}'
+    count = cache.get(key)
+    if count is None:
+        count = Group.objects.count()
+        cache.set(key, count, settings.GROUPS_CACHE_TIMEOUT)
+    return count
+
+
+def search_groups(query, limit=None):
+    """
+    Сообщества, у которых название или slug начинается с query.
+
+    Префикс ищется диапазоном [query, query + максимальный символ),
+    поэтому запрос идёт по индексам title и slug без полного просмотра.
+    """
+    limit = limit or settings.GROUPS_AUTOCOMPLETE_LIMIT
+    query = query.strip()
+    if not query:
+        return []
+    # Пользовательский ввод в ключ не попадает: длина и символы ключа
+    # не зависят от запроса
+    digest = hashlib.md5(query.encode()).hexdigest()
+    key = f'groups:search:{get_groups_version()}:{limit}:{digest}'
+    results = cache.get(key)
+    if results is None:
+        slug_query = query.lower()
+        results = list(
+            Group.objects.filter(
+                Q(title__gte=query, title__lt=query + PREFIX_END)
+                | Q(slug__gte=slug_query, slug__lt=slug_query + PREFIX_END)
+            ).order_by('title').values('id', 'title', 'slug')[:limit]
+        )
+        cache.set(key, results, settings.GROUPS_CACHE_TIMEOUT)
+    return results
+
+
+def invalidate_groups():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        # Версии ещё нет в кэше, значит и старых ключей нет
+        pass
+    cache.delete(DIRECTORY_CACHE_KEY)
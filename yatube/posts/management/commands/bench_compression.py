@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.test.client import RequestFactory
+from posts.models import Group, Post, User
+from yatube.compression import (available_encodings, compress,
+                                compress_variants)
+from yatube.response_cache import ResponseCacheMiddleware
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает размер главной страницы и процессорное время на '
+        'ответ при сжатии на лету и при отдаче заранее сжатой копии '
+        'из кэша. Данные создаются во временной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10)
+
+    def handle(self, *args, **options):
+        # Без панели отладки, которая добавляет свой HTML в страницу
+        with override_settings(DEBUG=False), transaction.atomic():
+            self.create_posts(options['posts'])
+            html = Client().get('/', HTTP_ACCEPT_ENCODING='identity').content
+            transaction.set_rollback(True)
+
+        repeat = options['repeat']
+        entry = {
+            'content': html,
+            'headers': [('Content-Type', 'text/html; charset=utf-8')],
+            'encoded': compress_variants(html),
+        }
+        middleware = ResponseCacheMiddleware(lambda request: None)
+        self.stdout.write(f'{"identity":>8}: {len(html)} bytes')
+        for encoding in available_encodings():
+            started = time.process_time()
+            for _ in range(repeat):
+                compressed = compress(html, encoding)
+            on_the_fly = (time.process_time() - started) / repeat
+
+            request = RequestFactory().get(
+                '/', HTTP_ACCEPT_ENCODING=encoding
+            )
+            started = time.process_time()
+            for _ in range(repeat):
+                middleware.build_response(request, entry, 'HIT')
+            cached = (time.process_time() - started) / repeat
+            self.stdout.write(
+                f'{encoding:>8}: {len(compressed)} bytes '
+                f'({len(compressed) / len(html):.1%}), CPU на ответ: '
+                f'сжатие на лету {on_the_fly * 1000:.3f} ms, '
+                f'сжатая копия из кэша {cached * 1000:.3f} ms'
+            )
+
+    def create_posts(self, count):
+        author = User.objects.create(username='bench_compression_author')
+        group = Group.objects.create(
+            title='bench', slug='bench-compression', description='bench'
+        )
+        Post.objects.bulk_create(
+            Post(text='Текст поста\n' * 20, author=author, group=group)
+            for _ in range(count)
+        )
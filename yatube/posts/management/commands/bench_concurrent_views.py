@@ -0,0 +1,75 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from posts.models import Comment, Post, User
+
+USERNAME = 'bench_concurrent_author'
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет запросы в секунду для profile и post_view под '
+        'параллельной нагрузкой с CONCURRENT_QUERIES и без него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        author, post = self.create_data()
+        addresses = (
+            f'/{author.username}/',
+            f'/{author.username}/{post.pk}/',
+        )
+        try:
+            for enabled in (False, True):
+                with override_settings(
+                    DEBUG=False, CONCURRENT_QUERIES=enabled
+                ):
+                    for address in addresses:
+                        rps = self.measure(
+                            address, options['clients'], options['seconds']
+                        )
+                        self.stdout.write(
+                            f'CONCURRENT_QUERIES={enabled!s:<5} {address}: '
+                            f'{rps:8.1f} req/s'
+                        )
+        finally:
+            author.delete()
+
+    def create_data(self):
+        User.objects.filter(username=USERNAME).delete()
+        author = User.objects.create(username=USERNAME)
+        Post.objects.bulk_create(
+            Post(text='Текст поста', author=author) for _ in range(50)
+        )
+        post = author.posts.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text='Комментарий')
+            for _ in range(50)
+        )
+        return author, post
+
+    def measure(self, address, clients, seconds):
+        done = []
+        deadline = time.monotonic() + seconds
+
+        def worker():
+            client = Client()
+            count = 0
+            while time.monotonic() < deadline:
+                client.get(address)
+                count += 1
+            connections.close_all()
+            done.append(count)
+
+        threads = [threading.Thread(target=worker) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(done) / seconds
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test import override_settings
+from posts.models import Comment, Post, User
+
+USERNAME = 'bench_concurrent_writer'
+
+BASELINE_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 100,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет скорость параллельной записи постов и комментариев '
+        'с настройками SQLITE_PRAGMAS и без них.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        User.objects.filter(username=USERNAME).delete()
+        author = User.objects.create(username=USERNAME)
+        post = Post.objects.create(text='Пост', author=author)
+        try:
+            for name, pragmas in (
+                ('baseline', BASELINE_PRAGMAS),
+                ('configured', None),
+            ):
+                overrides = {} if pragmas is None else {
+                    'SQLITE_PRAGMAS': pragmas
+                }
+                connections.close_all()
+                with override_settings(**overrides):
+                    writes, errors = self.measure(
+                        author, post, options['writers'], options['seconds']
+                    )
+                self.stdout.write(
+                    f'{name:>10}: {writes / options["seconds"]:8.1f} '
+                    f'writes/s, {errors} "database is locked" errors'
+                )
+        finally:
+            connections.close_all()
+            author.delete()
+
+    def measure(self, author, post, writers, seconds):
+        writes = []
+        errors = []
+        deadline = time.monotonic() + seconds
+
+        def worker():
+            count = failed = 0
+            while time.monotonic() < deadline:
+                try:
+                    Post.objects.create(text='Текст', author=author)
+                    Comment.objects.create(
+                        post=post, author=author, text='Комментарий'
+                    )
+                    count += 2
+                except OperationalError:
+                    failed += 1
+            connections.close_all()
+            writes.append(count)
+            errors.append(failed)
+
+        threads = [threading.Thread(target=worker) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(writes), sum(errors)
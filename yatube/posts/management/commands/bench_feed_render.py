@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.template.loader import get_template
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from posts.models import Comment, Group, Post, User
+from posts.views import feed_queryset
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендера ленты с наивным и оптимизированным '
+        'queryset на страницах из 10 и 100 постов. Данные создаются '
+        'во временной транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 100]
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.create_posts(max(options['sizes']))
+            for size in options['sizes']:
+                for name, queryset in (
+                    ('naive', Post.objects.all()),
+                    ('optimized', feed_queryset(Post.objects.all())),
+                ):
+                    seconds, queries = self.measure(
+                        queryset, size, options['repeat']
+                    )
+                    self.stdout.write(
+                        f'{size:>4} posts {name:>10}: '
+                        f'{seconds * 1000:8.2f} ms/page, '
+                        f'{queries} queries'
+                    )
+            transaction.set_rollback(True)
+
+    def create_posts(self, count):
+        author = User.objects.create(username='bench_feed_author')
+        group = Group.objects.create(
+            title='bench', slug='bench-feed', description='bench'
+        )
+        Post.objects.bulk_create(
+            Post(text='Текст поста\n' * 20, author=author, group=group)
+            for _ in range(count)
+        )
+        posts = Post.objects.filter(author=author)
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text='Комментарий')
+            for post in posts
+        )
+
+    def measure(self, queryset, size, repeat):
+        template = get_template('posts/index.html')
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        best = None
+        for _ in range(repeat):
+            page = Paginator(queryset, size).get_page(1)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                template.render({'page': page}, request)
+                elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries)
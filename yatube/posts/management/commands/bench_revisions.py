@@ -0,0 +1,104 @@
+import random
+import time
+import zlib
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.test.utils import CaptureQueriesContext
+from posts.models import Post, PostRevision, User
+from posts.revisions import get_revision_text
+
+WORDS = (
+    'пост автор сообщество лента подписка комментарий текст правка '
+    'версия история сервер запрос ответ страница кэш база индекс'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт длинный пост, правит его много раз и сравнивает объём '
+        'истории правок с хранением полных копий, а также время сборки '
+        'прежних версий. Данные создаются во временной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=5000)
+        parser.add_argument('--edits', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            self.run(rng, options['words'], options['edits'])
+            transaction.set_rollback(True)
+
+    def run(self, rng, words, edits):
+        author = User.objects.create(username='bench_revisions_author')
+        text = self.paragraphs(rng, words)
+        post = Post.objects.create(text=text, author=author)
+        versions = [text]
+        started = time.perf_counter()
+        for _ in range(edits):
+            post.text = self.edit(rng, post.text)
+            post.save()
+            versions.append(post.text)
+        saving = (time.perf_counter() - started) / edits
+
+        revisions = PostRevision.objects.filter(post=post)
+        stored = revisions.aggregate(total=Sum(Length('data')))['total']
+        snapshots = revisions.filter(is_snapshot=True).count()
+        old_versions = versions[:-1]
+        raw = sum(len(version.encode()) for version in old_versions)
+        compressed = sum(
+            len(zlib.compress(version.encode())) for version in old_versions
+        )
+        self.stdout.write(
+            f'Текст: {len(text.encode())} bytes, правок: {edits}, '
+            f'из них снимков: {snapshots}, сохранение: {saving * 1000:.1f} ms'
+        )
+        self.stdout.write(
+            f'История: {stored} bytes, {stored / edits:.0f} на версию; '
+            f'полные копии: {raw} bytes ({raw / edits:.0f} на версию), '
+            f'сжатые копии: {compressed} bytes '
+            f'({compressed / edits:.0f} на версию)'
+        )
+
+        slowest = 0
+        max_queries = 0
+        for number, expected in enumerate(old_versions, start=1):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                assert get_revision_text(post, number) == expected
+                slowest = max(slowest, time.perf_counter() - started)
+            max_queries = max(max_queries, len(queries))
+        self.stdout.write(
+            f'Сборка версии: не дольше {slowest * 1000:.1f} ms, '
+            f'запросов: {max_queries}'
+        )
+
+    def paragraphs(self, rng, words):
+        return '\n\n'.join(
+            self.sentence(rng, 60) for _ in range(max(words // 60, 1))
+        )
+
+    def sentence(self, rng, length):
+        return ' '.join(rng.choice(WORDS) for _ in range(length)) + '.'
+
+    def edit(self, rng, text):
+        """
+        Небольшая правка: замена нескольких слов, вставка или удаление
+        предложения.
+        """
+        words = text.split(' ')
+        position = rng.randrange(len(words))
+        action = rng.choice(('replace', 'insert', 'delete'))
+        if action == 'replace':
+            for index in range(position, min(position + 3, len(words))):
+                words[index] = rng.choice(WORDS)
+        elif action == 'insert':
+            words.insert(position, self.sentence(rng, 12))
+        elif len(words) > 20:
+            del words[position:position + 12]
+        return ' '.join(words)
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from posts.recommendations import compute_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «кого читать» по графу подписок '
+        'и общим группам. Запускается по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--top-k', type=int)
+        parser.add_argument('--fanout', type=int)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        processed = compute_recommendations(
+            chunk_size=options['chunk_size'],
+            top_k=options['top_k'],
+            fanout=options['fanout'],
+        )
+        self.stdout.write(
+            f'Пользователей: {processed}, '
+            f'за {time.perf_counter() - started:.1f} s'
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from posts.trending import prune
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет остывшие рейтинги «Популярного». Сами рейтинги '
+        'со временем не пересчитываются: старые события весят меньше '
+        'по построению. Запускается по расписанию.'
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune()
+        self.stdout.write(f'Удалено остывших рейтингов: {deleted}')
@@ -0,0 +1,49 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+from posts.export import EXPORTS, FORMATS, ExportError, export_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, комментарии или подписки в CSV или NDJSON. '
+        'Строки читаются пачками, память не зависит от объёма выгрузки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--user', help='Только данные пользователя.')
+        parser.add_argument('--group', help='Только данные сообщества.')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--output', help='Файл для выгрузки, по умолчанию stdout.'
+        )
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            chunks = export_chunks(
+                options['kind'], options['format'],
+                user=options['user'], group=options['group'],
+                batch_size=options['batch_size'],
+            )
+        except ExportError as error:
+            raise CommandError(error)
+
+        if not options['output']:
+            if options['gzip']:
+                raise CommandError('--gzip пишет только в файл (--output)')
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
+            return
+
+        written = 0
+        with open(options['output'], 'wb') as output:
+            if options['gzip']:
+                output = gzip.GzipFile(fileobj=output, mode='wb')
+            with output:
+                for chunk in chunks:
+                    output.write(chunk)
+                    written += len(chunk)
+        self.stderr.write(f'Выгружено {written} байт')
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from posts.prerender import Prerenderer, get_prerender_paths
+
+
+class Command(BaseCommand):
+    help = (
+        'Пишет на диск готовый HTML популярных страниц и его сжатые '
+        'варианты. Перерисовываются только устаревшие страницы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Перерисовать все страницы.'
+        )
+        parser.add_argument(
+            '--status', action='store_true',
+            help='Только показать, насколько устарели страницы.'
+        )
+        parser.add_argument(
+            '--watch', type=float, default=0,
+            help='Повторять каждые столько секунд.'
+        )
+
+    def handle(self, *args, **options):
+        prerenderer = Prerenderer()
+        if options['status']:
+            for path in get_prerender_paths():
+                staleness = prerenderer.staleness(path)
+                if staleness is None:
+                    state = 'актуальна'
+                elif staleness == float('inf'):
+                    state = 'не создана'
+                else:
+                    state = f'устарела на {staleness:.1f} с'
+                self.stdout.write(f'{path}: {state}')
+            return
+        while True:
+            stats = prerenderer.run(get_prerender_paths(), options['force'])
+            seconds = stats['seconds'] or 1e-9
+            self.stdout.write(
+                f'Страниц: {stats["rendered"]} из {stats["checked"]}, '
+                f'{stats["bytes"] / 1024:.0f} КиБ за {seconds:.2f} с '
+                f'({stats["rendered"] / seconds:.1f} стр/с), '
+                f'наибольшее отставание {stats["staleness"]:.1f} с'
+            )
+            if not options['watch']:
+                return
+            options['force'] = False
+            time.sleep(options['watch'])
@@ -0,0 +1,40 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from posts.deletion import purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет насовсем мягко удалённых пользователей, посты '
+        'и комментарии вместе с зависимыми записями, пачками. '
+        'Запускается по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention', type=int,
+            help='Сколько секунд хранить удалённое, по умолчанию '
+                 'SOFT_DELETE_RETENTION'
+        )
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        deleted = Counter()
+
+        def progress(model, count):
+            label = model._meta.label
+            deleted[label] += count
+            self.stdout.write(f'{label}: {deleted[label]}')
+
+        totals = purge_deleted(
+            retention=options['retention'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        self.stdout.write(
+            'Пользователей: {users}, постов: {posts}, '
+            'комментариев: {comments} (строк вместе с зависимыми)'.format(
+                **totals
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from yatube.ratelimit import ratelimit_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает, сколько запросов пропущено и отклонено лимитами. '
+        'Итог по всем процессам виден только с общим бэкендом кэша.'
+    )
+
+    def handle(self, *args, **options):
+        for scope, stats in sorted(ratelimit_stats().items()):
+            self.stdout.write(
+                f'{scope}: allowed {stats["allowed"]}, '
+                f'blocked {stats["blocked"]}'
+            )
@@ -0,0 +1,72 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from posts.follow_graph import FollowGraph, request_rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает граф подписок во всех процессах с общим кэшем. '
+        'С --bench-edges строит синтетический граф и замеряет память '
+        'и скорость запросов к нему.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bench-edges', type=int)
+        parser.add_argument('--bench-users', type=int, default=1000000)
+        parser.add_argument('--lookups', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        if options['bench_edges']:
+            self.benchmark(
+                options['bench_edges'],
+                options['bench_users'],
+                options['lookups']
+            )
+            return
+        started = time.perf_counter()
+        graph = FollowGraph.from_database()
+        elapsed = time.perf_counter() - started
+        request_rebuild()
+        self.report(graph, elapsed)
+
+    def report(self, graph, elapsed):
+        self.stdout.write(
+            f'Рёбер: {graph.edge_count}, '
+            f'память: {graph.memory_usage() / 2 ** 20:.1f} MiB, '
+            f'построение: {elapsed:.2f} s'
+        )
+
+    def benchmark(self, edges, users, lookups):
+        rng = random.Random(0)
+        per_user = max(1, edges // users)
+
+        def generate():
+            for user_id in range(1, users + 1):
+                for author_id in sorted(
+                    rng.sample(range(1, users + 1), per_user)
+                ):
+                    yield user_id, author_id
+
+        started = time.perf_counter()
+        graph = FollowGraph.from_edges(generate())
+        self.report(graph, time.perf_counter() - started)
+
+        pairs = [
+            (rng.randint(1, users), rng.randint(1, users))
+            for _ in range(lookups)
+        ]
+        for name, lookup in (
+            ('is_following', graph.is_following),
+            ('followers_count', lambda user, _: graph.followers_count(user)),
+            ('common_following', graph.common_following),
+            ('mutual', lambda user, _: graph.mutual(user)),
+        ):
+            started = time.perf_counter()
+            for user_id, other_id in pairs:
+                lookup(user_id, other_id)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name}: {elapsed / lookups * 10 ** 6:.2f} µs'
+            )
@@ -0,0 +1,32 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from posts.models import Comment, Post
+from posts.rendering import RENDERER_VERSION, rerender
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет готовый HTML постов и комментариев, записанных '
+        'до появления рендера или старой его версией. Можно запускать '
+        'на работающем сайте: до пересчёта такие записи рендерятся '
+        'при показе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        done = Counter()
+
+        def progress(model, count):
+            label = model._meta.label
+            done[label] += count
+            self.stdout.write(f'{label}: {done[label]}')
+
+        for model in (Post, Comment):
+            rerender(model, options['batch_size'], progress)
+        self.stdout.write(
+            f'Версия рендера {RENDERER_VERSION}, пересчитано записей: '
+            f'{sum(done.values())}'
+        )
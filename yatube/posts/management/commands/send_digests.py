@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from posts.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет подписчикам письма-дайджесты о новых постах '
+        'и комментариях. Запускается по расписанию, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        sent = send_digests(batch_size=options['batch_size'])
+        self.stdout.write(f'Отправлено писем: {sent}')
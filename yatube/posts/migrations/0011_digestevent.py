@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-19 09:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_auto_20210710_0210'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Новый пост'), ('comment', 'Новый комментарий')], max_length=10)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Comment')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['recipient', 'pk'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='digestevent',
+            index=models.Index(fields=['recipient', 'id'], name='digest_recipient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='digestevent',
+            index=models.Index(fields=['post', 'kind', 'recipient'], name='digest_post_idx'),
+        ),
+    ]
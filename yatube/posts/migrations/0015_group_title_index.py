@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_groupstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='group',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 2.2.6 on 2026-10-19 09:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+
+def fill_archive_months(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    for model_name, field in (
+        ('AuthorArchiveMonth', 'author_id'),
+        ('GroupArchiveMonth', 'group_id'),
+    ):
+        model = apps.get_model('posts', model_name)
+        rows = (
+            Post.objects.filter(**{f'{field}__isnull': False})
+                        .annotate(month=TruncMonth(
+                            'pub_date', output_field=models.DateField()
+                        ))
+                        .values(field, 'month')
+                        .annotate(post_count=Count('pk'))
+                        .order_by()
+        )
+        model.objects.bulk_create(
+            (model(**row) for row in rows.iterator()), batch_size=400
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_group_title_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorArchiveMonth',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupArchiveMonth',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'pub_date'], name='post_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', 'pub_date'], name='post_group_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='grouparchivemonth',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_months', to='posts.Group'),
+        ),
+        migrations.AddField(
+            model_name='authorarchivemonth',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_months', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='grouparchivemonth',
+            constraint=models.UniqueConstraint(fields=('group', 'month'), name='unique_group_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='authorarchivemonth',
+            constraint=models.UniqueConstraint(fields=('author', 'month'), name='unique_author_month'),
+        ),
+        migrations.RunPython(fill_archive_months, migrations.RunPython.noop),
+    ]
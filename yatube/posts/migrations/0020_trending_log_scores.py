@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Log
+
+# Совпадает с posts.trending.EPOCH (2020-01-01 UTC)
+EPOCH = 1577836800.0
+
+
+def to_log_scores(apps, schema_editor):
+    """
+    Переводит уже затухшие рейтинги в log2 веса, приведённого к EPOCH.
+    """
+    shift = (time.time() - EPOCH) / settings.TRENDING_HALF_LIFE
+    two = Value(2.0, output_field=FloatField())
+    for name in ('PostScore', 'GroupScore'):
+        model = apps.get_model('posts', name)
+        model.objects.filter(score__lte=0).delete()
+        model.objects.update(score=Log(two, F('score')) + shift)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_rendered_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_log_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.6 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+def mark_edited_posts(apps, schema_editor):
+    """
+    Правленые посты — те, у которых есть история. Время правки точно
+    не известно, берём время последнего сохранения.
+    """
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.filter(revisions__isnull=False).update(
+        text_edited_at=models.F('updated_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_trending_log_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_edited_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_edited_posts, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,87 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.safestring import mark_safe
+
+from .rendering import RENDERER_VERSION, render_text
 
 User = get_user_model()
 
+# Живые записи: условие частичных индексов и менеджеров по умолчанию
+LIVE = models.Q(deleted_at__isnull=True)
+DELETED = models.Q(deleted_at__isnull=False)
+
+
+class RenderedQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        update() минует save(), поэтому HTML нового текста считается
+        здесь же, а если text — выражение, готовый HTML помечается
+        устаревшим и рендерится при показе.
+        """
+        if 'text' in kwargs:
+            text = kwargs['text']
+            if isinstance(text, str):
+                kwargs.setdefault('text_html', render_text(text))
+                kwargs.setdefault('text_html_version', RENDERER_VERSION)
+            else:
+                kwargs.setdefault('text_html_version', 0)
+        return super().update(**kwargs)
+
+
+class LiveManager(models.Manager):
+    """
+    Скрывает мягко удалённые записи. Все записи доступны через
+    all_objects.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(LIVE)
+
+
+RenderedManager = models.Manager.from_queryset(RenderedQuerySet)
+LiveRenderedManager = LiveManager.from_queryset(RenderedQuerySet)
+
+
+class RenderedText(models.Model):
+    """
+    Текст с готовым HTML, который считается при сохранении, а не при
+    каждом показе.
+    """
+    text = models.TextField()
+    text_html = models.TextField(
+        blank=True,
+        default=''
+    )
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0
+    )
+
+    # Поля, которые сохраняются вместе с text
+    TEXT_FIELDS = ('text_html', 'text_html_version')
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.text_html = render_text(self.text)
+            self.text_html_version = RENDERER_VERSION
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.TEXT_FIELDS}
+        super().save(*args, **kwargs)
+
+    @property
+    def html(self):
+        if self.text_html_version == RENDERER_VERSION:
+            return mark_safe(self.text_html)
+        return render_text(self.text)
+
 
 class Group(models.Model):
     title = models.CharField(
-        max_length=200
+        max_length=200,
+        db_index=True
     )
     slug = models.SlugField(
         unique=True,
@@ -18,12 +93,41 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
-    text = models.TextField()
+class GroupStats(models.Model):
+    """
+    Счётчики сообщества. Сигналы сдвигают их на один пост при создании,
+    удалении поста и смене его сообщества.
+    """
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE
+    )
+    post_count = models.PositiveIntegerField(
+        default=0
+    )
+    author_count = models.PositiveIntegerField(
+        default=0
+    )
+    last_post_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    def __str__(self) -> str:
+        return f'{self.group_id}: {self.post_count}'
+
+
+class Post(RenderedText):
     pub_date = models.DateTimeField(
         'date published',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'date updated',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         related_name='posts',
@@ -41,15 +145,114 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    deleted_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    # Время последней правки текста; смена сообщества его не трогает
+    text_edited_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    objects = LiveRenderedManager()
+    all_objects = RenderedManager()
+
+    TEXT_FIELDS = RenderedText.TEXT_FIELDS + ('text_edited_at',)
+    # Поля, изменения которых разбирают сигналы post_save
+    TRACKED_FIELDS = ('group_id', 'deleted_at', 'text', 'updated_at')
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            # Архив автора и сообщества выбирает посты за месяц
+            # диапазоном по этим индексам
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_date_idx',
+                condition=LIVE
+            ),
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='post_group_date_idx',
+                condition=LIVE
+            ),
+            # Очередь purge_deleted: в индексе только удалённые посты
+            models.Index(
+                fields=['deleted_at'],
+                name='post_deleted_idx',
+                condition=DELETED
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_state()
+        return instance
+
+    def remember_state(self, update_fields=None):
+        """
+        Запоминает сохранённые значения TRACKED_FIELDS, чтобы сигналы
+        видели, что изменилось, без лишнего SELECT перед save().
+        """
+        state = getattr(self, '_saved_state', None)
+        if update_fields is None:
+            if self.get_deferred_fields() & set(self.TRACKED_FIELDS):
+                self._saved_state = None
+                return
+            state = self._saved_state = {}
+            fields = self.TRACKED_FIELDS
+        elif state is None:
+            # Несохранённые поля могли разойтись с базой
+            return
+        else:
+            fields = {
+                self._meta.get_field(name).attname for name in update_fields
+            }
+        for field in self.TRACKED_FIELDS:
+            if field in fields:
+                state[field] = getattr(self, field)
 
-class Comment(models.Model):
+    @property
+    def edited(self):
+        return self.text_edited_at is not None
+
+
+class PostRevision(models.Model):
+    """
+    Прежняя версия текста поста. Хранится разница с версией number + 1
+    или, каждые POST_REVISION_SNAPSHOT_EVERY версий, сжатый текст
+    целиком. Текущая версия лежит только в Post.text.
+    """
+    post = models.ForeignKey(
+        Post,
+        related_name='revisions',
+        on_delete=models.CASCADE
+    )
+    number = models.PositiveIntegerField()
+    created = models.DateTimeField()
+    is_snapshot = models.BooleanField(
+        default=False
+    )
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ['post', '-number']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'number'], name='unique_post_revision'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.post_id} v{self.number}'
+
+
+class Comment(RenderedText):
     post = models.ForeignKey(
         Post,
         related_name='comments',
@@ -60,17 +263,35 @@ class Comment(models.Model):
         related_name='comments',
         on_delete=models.CASCADE
     )
-    text = models.TextField()
     created = models.DateTimeField(
         'date published',
         auto_now_add=True
     )
+    deleted_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    objects = LiveRenderedManager()
+    all_objects = RenderedManager()
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', '-created'],
+                name='comment_post_idx',
+                condition=LIVE
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                name='comment_deleted_idx',
+                condition=DELETED
+            ),
+        ]
 
     def __str__(self) -> str:
-        return self.title
+        return self.text[:15]
 
 
 class Follow(models.Model):
@@ -97,3 +318,216 @@ class Follow(models.Model):
             f'Запись No: {self.pk}. Автор: {self.author} '
             f'- Подписчик: {self.user}'
         )
+
+
+class UserDeletion(models.Model):
+    """
+    Пользователь, удалённый мягко: он отключён через is_active, его посты
+    и комментарии скрыты, а сам он ждёт окончательного удаления командой
+    purge_deleted.
+    """
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='deletion',
+        on_delete=models.CASCADE
+    )
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True
+    )
+
+    def __str__(self) -> str:
+        return f'{self.user_id}: {self.deleted_at}'
+
+
+class DigestEvent(models.Model):
+    """
+    Событие для письма-дайджеста: новый пост автора, на которого
+    подписан получатель, или новый комментарий к его посту.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KIND_CHOICES = [
+        (POST, 'Новый пост'),
+        (COMMENT, 'Новый комментарий'),
+    ]
+
+    recipient = models.ForeignKey(
+        User,
+        related_name='digest_events',
+        on_delete=models.CASCADE
+    )
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    comment = models.ForeignKey(
+        Comment,
+        related_name='+',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True
+    )
+    created = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ['recipient', 'pk']
+        indexes = [
+            models.Index(
+                fields=['recipient', 'id'], name='digest_recipient_idx'
+            ),
+            models.Index(
+                fields=['post', 'kind', 'recipient'], name='digest_post_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.kind} для {self.recipient}: {self.post_id}'
+
+
+class Recommendation(models.Model):
+    """
+    Рекомендация «кого читать», рассчитанная командой
+    compute_recommendations.
+    """
+    user = models.ForeignKey(
+        User,
+        related_name='recommendations',
+        on_delete=models.CASCADE
+    )
+    recommended = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField()
+    created = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recommended'],
+                name='unique_user_recommended'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='recommendation_user_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user} -> {self.recommended} ({self.score:.2f})'
+
+
+class PostScore(models.Model):
+    """
+    Текущий рейтинг поста в ленте «Популярное». Растёт от событий
+    и периодически уменьшается командой decay_trending.
+    """
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        related_name='trending_score',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField(
+        default=0
+    )
+
+    class Meta:
+        ordering = ['-score', '-post_id']
+        indexes = [
+            models.Index(
+                fields=['-score', '-post'], name='post_score_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.post_id}: {self.score:.2f}'
+
+
+class GroupScore(models.Model):
+    """
+    Текущий рейтинг сообщества, считается так же, как PostScore.
+    """
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        related_name='trending_score',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField(
+        default=0
+    )
+
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score'], name='group_score_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.group_id}: {self.score:.2f}'
+
+
+class ArchiveMonth(models.Model):
+    """
+    Число постов за месяц для навигации по архиву. Поддерживается
+    сигналами при создании, удалении поста и смене его сообщества.
+    """
+    month = models.DateField()
+    post_count = models.PositiveIntegerField(
+        default=0
+    )
+
+    class Meta:
+        abstract = True
+        ordering = ['-month']
+
+
+class AuthorArchiveMonth(ArchiveMonth):
+    author = models.ForeignKey(
+        User,
+        related_name='archive_months',
+        on_delete=models.CASCADE
+    )
+
+    class Meta(ArchiveMonth.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'month'], name='unique_author_month'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.author_id} {self.month:%Y-%m}: {self.post_count}'
+
+
+class GroupArchiveMonth(ArchiveMonth):
+    group = models.ForeignKey(
+        Group,
+        related_name='archive_months',
+        on_delete=models.CASCADE
+    )
+
+    class Meta(ArchiveMonth.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'month'], name='unique_group_month'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.group_id} {self.month:%Y-%m}: {self.post_count}'
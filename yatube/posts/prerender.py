@@ -0,0 +1,168 @@
+import json
+import os
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler, WSGIRequest
+from django.urls import reverse
+from yatube.compression import precompress
+from yatube.response_cache import get_tag_versions
+
+from .models import Group
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def get_prerender_paths():
+    """
+    Адреса для предварительного рендера: PRERENDER_URLS и страницы
+    самых активных сообществ.
+    """
+    paths = [reverse(name) for name in settings.PRERENDER_URLS]
+    slugs = Group.objects.order_by(
+        '-stats__post_count', 'title'
+    ).values_list('slug', flat=True)[:settings.PRERENDER_TOP_GROUPS]
+    paths.extend(
+        reverse('posts:group_posts', kwargs={'slug': slug})
+        for slug in slugs
+    )
+    return paths
+
+
+def file_path(path):
+    """
+    Файл для адреса: /group/cats/ -> <root>/group/cats/index.html.
+    """
+    return os.path.join(
+        settings.PRERENDER_ROOT, path.strip('/'), 'index.html'
+    )
+
+
+def _write(filename, content):
+    # Сервер не должен увидеть наполовину записанный файл
+    tmp = f'{filename}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, filename)
+
+
+class Prerenderer:
+    """
+    Рендерит страницы полным проходом через middleware и пишет на диск
+    HTML и его сжатые варианты, которые фронтовый сервер отдаёт сам.
+    Страницы отрендерены для анонима, поэтому отдавать их можно только
+    запросам без сессионной куки, остальные уходят в Django:
+
+        map $cookie_sessionid $prerendered {
+            ""      /index.html;
+            default /-;
+        }
+
+        location / {
+            root <PRERENDER_ROOT>;
+            gzip_static on;
+            try_files $uri$prerendered @django;
+        }
+
+    Имя куки в map должно совпадать с SESSION_COOKIE_NAME.
+
+    В manifest.json для каждой страницы хранятся версии тегов
+    response_cache на момент рендера: страница устарела, когда
+    сигналы сбросили один из её тегов.
+    """
+
+    def __init__(self):
+        self.handler = WSGIHandler()
+        self.manifest_path = os.path.join(
+            settings.PRERENDER_ROOT, MANIFEST_NAME
+        )
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_manifest(self):
+        os.makedirs(settings.PRERENDER_ROOT, exist_ok=True)
+        _write(self.manifest_path, json.dumps(self.manifest).encode())
+
+    def staleness(self, path, now=None):
+        """
+        Сколько секунд страница устарела: None — актуальна,
+        inf — ещё не рендерилась.
+        """
+        entry = self.manifest.get(path)
+        if entry is None or not os.path.exists(file_path(path)):
+            return float('inf')
+        now = time.time() if now is None else now
+        current = get_tag_versions(entry['tags'])
+        changed = [
+            version for tag, version in current.items()
+            if version != entry['tags'][tag]
+        ]
+        if not changed:
+            return None
+        # Версия тега — время его сброса в наносекундах
+        return max(0.0, now - min(changed) / 1e9)
+
+    def render(self, path):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'SERVER_NAME': settings.PRERENDER_HOST,
+            'SERVER_PORT': '80',
+            'wsgi.input': BytesIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        request = WSGIRequest(environ)
+        started = time.time_ns()
+        response = self.handler.get_response(request)
+        if response.status_code != 200 or response.streaming:
+            return None
+        filename = file_path(path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        content = response.content
+        _write(filename, content)
+        written = len(content)
+        for suffix, compressed in precompress(content).items():
+            _write(filename + suffix, compressed)
+            written += len(compressed)
+        if getattr(request, '_cache_update_cache', None) is False:
+            # Ответ взят из кэша cache_page и может не содержать последних
+            # изменений: страница остаётся устаревшей до следующего запуска
+            return written
+        self.manifest[path] = {
+            'tags': get_tag_versions(
+                getattr(request, 'cache_tags', ()), initial=started - 1
+            ),
+            'rendered_at': time.time(),
+        }
+        return written
+
+    def run(self, paths, force=False):
+        """
+        Перерисовывает устаревшие страницы из paths (все при force).
+        Возвращает статистику: сколько страниц и байт записано, за какое
+        время и насколько устарела самая старая из них.
+        """
+        started = time.perf_counter()
+        stats = {'checked': 0, 'rendered': 0, 'bytes': 0, 'staleness': 0.0}
+        for path in paths:
+            stats['checked'] += 1
+            staleness = self.staleness(path)
+            if staleness is None and not force:
+                continue
+            written = self.render(path)
+            if written is None:
+                continue
+            stats['rendered'] += 1
+            stats['bytes'] += written
+            if staleness is not None and staleness != float('inf'):
+                stats['staleness'] = max(stats['staleness'], staleness)
+        self.save_manifest()
+        stats['seconds'] = time.perf_counter() - started
+        return stats
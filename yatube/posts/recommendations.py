@@ -0,0 +1,125 @@
+import heapq
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from .follow_graph import get_follow_graph
+from .models import Post, Recommendation, User
+
+# Вес каждого пути до кандидата
+FRIEND_OF_FRIEND_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.2
+GROUP_WEIGHT = 0.3
+# Сколько подписчиков каждого автора учитывать для совместных подписок
+CO_FOLLOWERS_SAMPLE = 10
+
+
+def load_group_authors():
+    """
+    Авторы каждой группы и группы каждого автора по постам.
+    """
+    group_authors = {}
+    author_groups = {}
+    rows = (
+        Post.objects.filter(group__isnull=False)
+                    .order_by('group_id', 'author_id')
+                    .values_list('group_id', 'author_id')
+                    .distinct()
+                    .iterator(chunk_size=10000)
+    )
+    for group_id, author_id in rows:
+        group_authors.setdefault(group_id, array('I')).append(author_id)
+        author_groups.setdefault(author_id, array('I')).append(group_id)
+    return group_authors, author_groups
+
+
+def score_user(user_id, graph, group_authors, author_groups, fanout,
+               excluded=()):
+    """
+    Оценки кандидатов для одного пользователя.
+
+    fanout ограничивает число соседей, просматриваемых на каждом шаге,
+    чтобы популярные авторы не делали расчёт квадратичным. Кандидаты
+    из excluded, например отключённые пользователи, не предлагаются.
+    """
+    scores = Counter()
+    following = graph.following(user_id)
+    for friend_id in following[:fanout]:
+        for candidate_id in graph.following(friend_id)[:fanout]:
+            scores[candidate_id] += FRIEND_OF_FRIEND_WEIGHT
+        # Кого ещё читают подписчики тех же авторов
+        co_followers = graph.followers(friend_id)[:CO_FOLLOWERS_SAMPLE]
+        for co_follower_id in co_followers:
+            if co_follower_id == user_id:
+                continue
+            for candidate_id in graph.following(co_follower_id)[:fanout]:
+                scores[candidate_id] += CO_FOLLOW_WEIGHT
+    for group_id in author_groups.get(user_id, ())[:fanout]:
+        for candidate_id in group_authors[group_id][:fanout]:
+            scores[candidate_id] += GROUP_WEIGHT
+    scores.pop(user_id, None)
+    for author_id in (*following, *excluded):
+        scores.pop(author_id, None)
+    return scores
+
+
+def compute_recommendations(chunk_size=None, top_k=None, fanout=None):
+    """
+    Пересчитывает рекомендации всех пользователей пачками по chunk_size.
+
+    Граф подписок берётся общий для процесса, подписки во время
+    расчёта доходят до него сигналами. Кроме графа в памяти держатся
+    авторы групп и оценки одной пачки; рекомендации пачки заменяются
+    одной транзакцией.
+    """
+    chunk_size = chunk_size or settings.RECOMMENDATIONS_CHUNK_SIZE
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+    fanout = fanout or settings.RECOMMENDATIONS_FANOUT
+    graph = get_follow_graph()
+    group_authors, author_groups = load_group_authors()
+    inactive = set(
+        User.objects.filter(is_active=False).values_list('pk', flat=True)
+    )
+    processed = 0
+    last_id = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(pk__gt=last_id, is_active=True)
+                        .order_by('pk')
+                        .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not user_ids:
+            return processed
+        last_id = user_ids[-1]
+        rows = []
+        for user_id in user_ids:
+            scores = score_user(
+                user_id, graph, group_authors, author_groups, fanout,
+                inactive
+            )
+            best = heapq.nlargest(top_k, scores.items(), key=lambda x: x[1])
+            rows.extend(
+                Recommendation(
+                    user_id=user_id, recommended_id=candidate_id, score=score
+                )
+                for candidate_id, score in best
+            )
+        with transaction.atomic():
+            Recommendation.objects.filter(user_id__in=user_ids).delete()
+            Recommendation.objects.bulk_create(rows)
+        processed += len(user_ids)
+
+
+def get_recommendations(user_id, limit=None):
+    """
+    Готовые рекомендации пользователя: один запрос по индексу.
+    Отключённые после расчёта пользователи пропускаются.
+    """
+    limit = limit or settings.RECOMMENDATIONS_SHOWN
+    return list(
+        Recommendation.objects.filter(
+            user_id=user_id, recommended__is_active=True
+        ).select_related('recommended')[:limit]
+    )
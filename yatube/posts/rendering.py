@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import transaction
+from django.template.defaultfilters import linebreaksbr
+
+# Увеличивается при любом изменении render_text: записи со старой
+# версией рендерятся на лету, пока их не пересчитает render_texts
+RENDERER_VERSION = 1
+
+
+def render_text(text):
+    """
+    Экранированный HTML текста поста или комментария.
+    """
+    return linebreaksbr(text, autoescape=True)
+
+
+def rerender(model, batch_size=None, progress=None):
+    """
+    Пересчитывает сохранённый HTML записей model со старой версией
+    рендера пачками по batch_size, по индексу первичного ключа.
+    После каждой пачки вызывается progress(model, count).
+    """
+    batch_size = batch_size or settings.RENDER_BATCH_SIZE
+    manager = model._base_manager
+    stale = manager.exclude(
+        text_html_version=RENDERER_VERSION
+    ).order_by('pk')
+    last_id = 0
+    total = 0
+    while True:
+        with transaction.atomic():
+            # Блокировка не даёт затереть HTML поста, который правят
+            # прямо сейчас
+            rows = list(
+                stale.select_for_update()
+                     .filter(pk__gt=last_id)
+                     .values_list('pk', 'text')[:batch_size]
+            )
+            if not rows:
+                return total
+            manager.bulk_update(
+                [
+                    model(
+                        pk=pk,
+                        text_html=render_text(text),
+                        text_html_version=RENDERER_VERSION
+                    )
+                    for pk, text in rows
+                ],
+                ['text_html', 'text_html_version']
+            )
+        last_id = rows[-1][0]
+        total += len(rows)
+        if progress is not None:
+            progress(model, len(rows))
@@ -0,0 +1,107 @@
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import Post, PostRevision
+
+# Слово вместе с пробелами после него; склейка токенов даёт исходный текст
+TOKEN_RE = re.compile(r'\s+|\S+\s*')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text)
+
+
+def make_delta(source, target):
+    """
+    Сжатые инструкции, собирающие target из source: пара [начало, конец]
+    копирует токены source, строка вставляется как есть.
+    """
+    source_tokens = tokenize(source)
+    target_tokens = tokenize(target)
+    matcher = SequenceMatcher(None, source_tokens, target_tokens)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j1 != j2:
+            ops.append(''.join(target_tokens[j1:j2]))
+    raw = json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+    return zlib.compress(raw.encode())
+
+
+def apply_delta(source, data):
+    tokens = tokenize(source)
+    return ''.join(
+        ''.join(tokens[op[0]:op[1]]) if isinstance(op, list) else op
+        for op in json.loads(zlib.decompress(data))
+    )
+
+
+def record_revision(post, text, created):
+    """
+    Сохраняет прежний текст поста, заменённый на post.text.
+
+    Обычно это разница с новым текстом, а каждая
+    POST_REVISION_SNAPSHOT_EVERY-я версия, как и переписанный почти
+    целиком текст, хранится сжатой копией. Строка поста блокируется
+    до конца транзакции, чтобы параллельные правки не взяли один номер.
+    """
+    with transaction.atomic():
+        return _record_revision(post, text, created)
+
+
+def _record_revision(post, text, created):
+    last = PostRevision.objects.filter(post=OuterRef('pk')).order_by(
+        '-number'
+    ).values('number')[:1]
+    # Подзапрос вместо Max: FOR UPDATE несовместим с GROUP BY
+    last = Post.all_objects.select_for_update().filter(
+        pk=post.pk
+    ).annotate(last=Subquery(last)).values_list('last', flat=True).get()
+    number = (last or 0) + 1
+    snapshot = zlib.compress(text.encode())
+    is_snapshot = number % settings.POST_REVISION_SNAPSHOT_EVERY == 0
+    data = snapshot
+    if not is_snapshot:
+        data = make_delta(post.text, text)
+        if len(snapshot) <= len(data):
+            data, is_snapshot = snapshot, True
+    return PostRevision.objects.create(
+        post=post,
+        number=number,
+        created=created,
+        is_snapshot=is_snapshot,
+        data=data
+    )
+
+
+def get_revision_text(post, number):
+    """
+    Текст прежней версии number.
+
+    Разницы применяются от ближайшего следующего снимка или от текущего
+    текста, поэтому читается не больше POST_REVISION_SNAPSHOT_EVERY
+    строк истории одним запросом.
+    """
+    every = settings.POST_REVISION_SNAPSHOT_EVERY
+    boundary = -(-number // every) * every
+    revisions = PostRevision.objects.filter(post=post, number__gte=number)
+    chain = list(revisions.filter(number__lte=boundary))
+    if chain and chain[0].number == boundary and not chain[0].is_snapshot:
+        # Снимки писались с другим шагом: идём от текущей версии
+        chain = list(revisions)
+    if not chain or chain[-1].number != number:
+        raise PostRevision.DoesNotExist
+    text = post.text
+    for revision in chain:
+        if revision.is_snapshot:
+            text = zlib.decompress(revision.data).decode()
+        else:
+            text = apply_delta(text, revision.data)
+    return text
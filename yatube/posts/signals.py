@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from yatube.response_cache import purge_tags
+
+from .archive import adjust_author_month, adjust_group_month
+from .follow_graph import get_built_graph
+from .follow_state import invalidate_follow_state
+from .groups import adjust_group_stats, invalidate_groups
+from .models import Comment, Follow, Group, Post, Recommendation
+from .revisions import record_revision
+from .trending import bump
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Настраивает каждое новое соединение с SQLite: WAL, размер кэша,
+    ожидание блокировки вместо ошибки "database is locked".
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(request_started)
+def close_unusable_connections(sender, **kwargs):
+    """
+    Проверяет постоянные соединения перед запросом и закрывает
+    разорванные, чтобы запрос открыл новое.
+    """
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for conn in connections.all():
+        if conn.connection is not None and not conn.is_usable():
+            conn.close()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_follow_state(instance.user_id, instance.author_id)
+    purge_tags(f'author:{instance.user_id}', f'author:{instance.author_id}')
+    if kwargs['signal'] is post_save and kwargs['created']:
+        # Новый подписчик поднимает свежий пост автора в «Популярном»
+        latest = Post.objects.filter(author_id=instance.author_id).first()
+        if latest is not None:
+            weight = settings.TRENDING_WEIGHTS['follow']
+            bump(latest.pk, latest.group_id, weight)
+    if kwargs['signal'] is post_save:
+        Recommendation.objects.filter(
+            user_id=instance.user_id, recommended_id=instance.author_id
+        ).delete()
+    graph = get_built_graph()
+    if graph is None:
+        return
+    if kwargs['signal'] is post_save:
+        graph.add(instance.user_id, instance.author_id)
+    else:
+        graph.remove(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    purge_tags(f'post:{instance.post_id}')
+    if created:
+        bump(
+            instance.post_id,
+            instance.post.group_id,
+            settings.TRENDING_WEIGHTS['comment']
+        )
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, **kwargs):
+    """
+    Передаёт обработчикам post_save сохранённое состояние поста.
+    Обычно оно запомнено при загрузке; SELECT нужен, только если пост
+    создан без загрузки из базы или часть полей отложена.
+    """
+    instance._previous = None
+    if instance.pk is None:
+        return
+    previous = getattr(instance, '_saved_state', None)
+    if previous is None:
+        previous = Post.all_objects.filter(pk=instance.pk).values(
+            *Post.TRACKED_FIELDS
+        ).first()
+    instance._previous = previous and dict(previous)
+    if previous and previous['text'] != instance.text:
+        # Сохранится тем же UPDATE, что и новый текст
+        instance.text_edited_at = timezone.now()
+
+
+def purge_post_pages(post, *group_ids):
+    purge_tags(
+        'feed',
+        f'post:{post.pk}',
+        f'author:{post.author_id}',
+        *(f'group:{group_id}' for group_id in group_ids if group_id)
+    )
+
+
+def forget_post(post):
+    """
+    Убирает пост из счётчиков сообщества и архива.
+    """
+    adjust_author_month(post.author_id, post.pub_date, -1)
+    if post.group_id is not None:
+        adjust_group_stats(post.group_id, post, -1)
+        adjust_group_month(post.group_id, post.pub_date, -1)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    instance.remember_state(kwargs['update_fields'])
+    previous_group_id = previous and previous['group_id']
+    purge_post_pages(instance, previous_group_id, instance.group_id)
+    if previous and previous['deleted_at'] is None and instance.deleted_at:
+        # Мягкое удаление
+        forget_post(instance)
+        return
+    update_fields = kwargs['update_fields']
+    text_saved = update_fields is None or 'text' in update_fields
+    if text_saved and previous and previous['text'] != instance.text:
+        record_revision(instance, previous['text'], previous['updated_at'])
+    if previous_group_id != instance.group_id or created:
+        if previous_group_id is not None:
+            adjust_group_stats(previous_group_id, instance, -1)
+        if instance.group_id is not None:
+            adjust_group_stats(instance.group_id, instance, 1)
+        # Дата публикации не меняется, поэтому месяц в архиве прежний
+        if created:
+            adjust_author_month(instance.author_id, instance.pub_date, 1)
+        if previous_group_id is not None:
+            adjust_group_month(previous_group_id, instance.pub_date, -1)
+        if instance.group_id is not None:
+            adjust_group_month(instance.group_id, instance.pub_date, 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    purge_post_pages(instance, instance.group_id)
+    if instance.deleted_at is None:
+        # Мягко удалённый пост уже убран из счётчиков
+        forget_post(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    invalidate_groups()
+    purge_tags(f'group:{instance.pk}')
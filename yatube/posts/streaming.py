@@ -0,0 +1,36 @@
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+STREAM_MARKER = '<!-- stream -->'
+
+
+def render_stream(request, template_name, context, name, items,
+                  item_template, chunk_size):
+    """
+    Потоковый ответ: страница рендерится с меткой на месте списка name,
+    часть до метки отправляется сразу, затем элементы items пачками
+    по chunk_size через item_template, затем остаток страницы.
+
+    items может быть итератором queryset: в памяти держится одна пачка,
+    а не весь список и не вся страница.
+    """
+    context = dict(context, **{f'{name}_stream': mark_safe(STREAM_MARKER)})
+    head, tail = render_to_string(
+        template_name, context, request
+    ).split(STREAM_MARKER, 1)
+
+    def generate():
+        yield head
+        template = get_template(item_template)
+        chunk = []
+        for item in items:
+            chunk.append(template.render({'item': item}))
+            if len(chunk) >= chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        yield tail
+
+    return StreamingHttpResponse(generate())
@@ -0,0 +1,35 @@
+from sorl.thumbnail import get_thumbnail
+from taskqueue.queue import task
+
+from . import deletion, digests
+from .models import Post
+
+# Совпадает с параметрами {% thumbnail %} в posts/post_item.html
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@task
+def generate_thumbnail(post_id):
+    """
+    Заранее создаёт миниатюру картинки поста, чтобы её не генерировал
+    первый запрос ленты.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@task
+def fan_out_post(post_id):
+    digests.fan_out_post(post_id)
+
+
+@task
+def add_comment_event(comment_id):
+    digests.add_comment_event(comment_id)
+
+
+@task
+def purge_deleted():
+    deletion.purge_deleted()
@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.concurrency import run_concurrently
+from posts.models import Comment, Follow, Post, User
+from yatube import admission
+
+
+class AdmissionControlTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_admission_user')
+        cls.author = User.objects.create(username='test_admission_author')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        post = Post.objects.create(text='Тестовый текст', author=cls.author)
+        Comment.objects.create(post=post, author=cls.user, text='Тест')
+
+    def setUp(self):
+        cache.clear()
+        admission._loads.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.profile_url = reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        )
+
+    def test_normal_load(self):
+        response = self.client.get(self.profile_url)
+        self.assertFalse(response.wsgi_request.degraded)
+        self.assertContains(response, 'Комментариев: 1')
+        self.assertContains(response, 'Подписчиков: 1')
+        load = admission.get_load('posts:profile')
+        self.assertEqual(load.in_flight, 0)
+        self.assertGreater(load.db_time, 0)
+
+    @override_settings(ADMISSION_DEGRADE_IN_FLIGHT=0)
+    def test_degraded_page(self):
+        response = self.client.get(self.profile_url)
+        self.assertTrue(response.wsgi_request.degraded)
+        self.assertContains(response, 'Тестовый текст')
+        self.assertNotContains(response, 'Комментариев')
+        self.assertNotContains(response, 'Подписчиков')
+
+    def test_stale_copy_under_load(self):
+        url = reverse('posts:follow_index')
+        fresh = self.client.get(url)
+        Post.objects.create(text='Новый пост', author=self.author)
+        with self.settings(ADMISSION_DEGRADE_IN_FLIGHT=0):
+            # Копия отдаётся без сессии и других запросов к базе
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+        self.assertEqual(response.content, fresh.content)
+        self.assertIn('Stale', response['Warning'])
+        # Копия своя у каждого пользователя
+        other = Client()
+        other.force_login(self.author)
+        with self.settings(ADMISSION_DEGRADE_IN_FLIGHT=0):
+            response = other.get(url)
+        self.assertFalse(response.has_header('Warning'))
+
+    @override_settings(ADMISSION_PROBE_EVERY=3)
+    def test_slow_db_recovers(self):
+        '''
+        Пока отдаётся копия, редкие пробные запросы обновляют время базы.
+        '''
+        self.client.get(self.profile_url)
+        load = admission.get_load('posts:profile')
+        load.db_time = 1.0
+        degraded = [
+            self.client.get(self.profile_url).wsgi_request.degraded
+            for _ in range(3)
+        ]
+        self.assertEqual(degraded, [True, True, False])
+        self.assertLess(load.db_time, 1.0)
+        for _ in range(30):
+            self.client.get(self.profile_url)
+        self.assertFalse(
+            self.client.get(self.profile_url).wsgi_request.degraded
+        )
+
+    @override_settings(ADMISSION_REJECT_IN_FLIGHT=0)
+    def test_reject_under_overload(self):
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertEqual(admission.get_load('posts:profile').in_flight, 0)
+        # Дешёвые страницы продолжают работать
+        response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(CONCURRENT_QUERIES=True)
+    def test_concurrent_queries_are_timed(self):
+        timer = admission.DBTimer()
+        with connection.execute_wrapper(timer):
+            [_, wrappers] = run_concurrently(
+                lambda: None,
+                lambda: list(connections['default'].execute_wrappers)
+            )
+        self.assertIn(timer, wrappers)
@@ -0,0 +1,120 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from posts.archive import get_author_months, get_group_months
+from posts.models import AuthorArchiveMonth, Group, GroupArchiveMonth, Post
+from posts.models import User
+
+
+def moment(year, month, day=15):
+    return timezone.make_aware(datetime.datetime(year, month, day, 12))
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_archive_author')
+        cls.group = Group.objects.create(
+            title='Архив', slug='test-archive', description='-'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другой архив', slug='test-archive-other', description='-'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def create_post(self, when, group=None):
+        with mock.patch('django.utils.timezone.now', return_value=when):
+            return Post.objects.create(
+                text='Тестовый текст', author=self.author, group=group
+            )
+
+    def test_months_follow_posts(self):
+        '''
+        Счётчики месяцев меняются при создании, переносе и удалении поста.
+        '''
+        old = self.create_post(moment(2019, 3), self.group)
+        self.create_post(moment(2019, 3, 20), self.group)
+        self.create_post(moment(2020, 1))
+        self.assertEqual(get_author_months(self.author.pk), [
+            (datetime.date(2020, 1, 1), 1),
+            (datetime.date(2019, 3, 1), 2),
+        ])
+        self.assertEqual(get_group_months(self.group.pk), [
+            (datetime.date(2019, 3, 1), 2),
+        ])
+
+        old.group = self.other_group
+        old.save()
+        self.assertEqual(get_group_months(self.group.pk), [
+            (datetime.date(2019, 3, 1), 1),
+        ])
+        self.assertEqual(get_group_months(self.other_group.pk), [
+            (datetime.date(2019, 3, 1), 1),
+        ])
+
+        old.delete()
+        self.assertFalse(
+            GroupArchiveMonth.objects.filter(group=self.other_group).exists()
+        )
+        self.assertEqual(
+            AuthorArchiveMonth.objects.get(
+                author=self.author, month=datetime.date(2019, 3, 1)
+            ).post_count,
+            1
+        )
+
+    def test_months_are_cached(self):
+        self.create_post(moment(2019, 3))
+        get_author_months(self.author.pk)
+        with self.assertNumQueries(0):
+            get_author_months(self.author.pk)
+
+    def test_month_pages(self):
+        '''
+        Страница месяца показывает только посты этого месяца.
+        '''
+        march = self.create_post(moment(2019, 3), self.group)
+        self.create_post(moment(2019, 4), self.group)
+        cases = [
+            ('posts:profile_archive', self.author.username),
+            ('posts:group_archive', self.group.slug),
+        ]
+        for name, owner in cases:
+            with self.subTest(name=name):
+                response = self.client.get(
+                    reverse(name, args=[owner, 2019, 3])
+                )
+                self.assertEqual(list(response.context['page']), [march])
+                self.assertEqual(
+                    response.context['archive_month'],
+                    timezone.make_aware(datetime.datetime(2019, 3, 1))
+                )
+                self.assertContains(
+                    response, reverse(name, args=[owner, 2019, 4])
+                )
+
+    def test_profile_lists_archive(self):
+        self.create_post(moment(2019, 3))
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertContains(
+            response,
+            reverse(
+                'posts:profile_archive', args=[self.author.username, 2019, 3]
+            )
+        )
+
+    def test_invalid_month(self):
+        response = self.client.get(reverse(
+            'posts:profile_archive', args=[self.author.username, 2019, 13]
+        ))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,78 @@
+import gzip
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+from django.urls import reverse
+from posts.models import Post, User
+from yatube import compression
+
+
+@override_settings(COMPRESSION_ENCODINGS=['br', 'zstd', 'gzip'])
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_compression_user')
+        for _ in range(3):
+            Post.objects.create(text='Тестовый текст ' * 50, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_choose_encoding(self):
+        factory = RequestFactory()
+        cases = {
+            'gzip, deflate': 'gzip',
+            'br;q=1.0, gzip;q=0.5': 'br',
+            'gzip;q=0, identity': None,
+            '*': 'br',
+            '': None,
+        }
+        for header, expected in cases.items():
+            request = factory.get('/', HTTP_ACCEPT_ENCODING=header)
+            with self.subTest(header=header):
+                self.assertEqual(
+                    compression.choose_encoding(request, ['br', 'gzip']),
+                    expected
+                )
+
+    def test_compress_stream(self):
+        chunks = [b'<p>post</p>' * 100 for _ in range(5)]
+        compressed = list(compression.compress_stream(chunks, 'gzip'))
+        # Каждая часть отправляется, не дожидаясь конца потока
+        self.assertGreaterEqual(len(compressed), 5)
+        self.assertEqual(
+            gzip.decompress(b''.join(compressed)), b''.join(chunks)
+        )
+
+    def test_middleware_compresses_html(self):
+        url = reverse('about:author')
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_skip_small_responses(self):
+        response = self.client.get(
+            reverse('posts:groups_autocomplete'), {'q': 'x'},
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cached_page_compressed_once(self):
+        url = reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        )
+        plain = self.client.get(url).content
+        with mock.patch(
+            'yatube.compression.compress', wraps=compression.compress
+        ) as compress:
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain)
@@ -0,0 +1,50 @@
+import threading
+
+from django.db import connections
+from django.http import Http404
+from django.test import SimpleTestCase, override_settings
+from posts.concurrency import run_concurrently
+
+
+class RunConcurrentlyTests(SimpleTestCase):
+    def test_sequential_by_default(self):
+        '''
+        Без CONCURRENT_QUERIES функции выполняются в текущем потоке.
+        '''
+        current = threading.current_thread()
+        results = run_concurrently(
+            threading.current_thread, threading.current_thread
+        )
+        self.assertEqual(results, [current, current])
+
+    @override_settings(CONCURRENT_QUERIES=True)
+    def test_results_keep_order(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def job(value):
+            # Все три функции должны выполняться одновременно
+            barrier.wait()
+            return value
+
+        results = run_concurrently(
+            lambda: job(1), lambda: job(2), lambda: job(3)
+        )
+        self.assertEqual(results, [1, 2, 3])
+
+    @override_settings(CONCURRENT_QUERIES=True)
+    def test_exception_is_propagated(self):
+        def not_found():
+            raise Http404
+
+        with self.assertRaises(Http404):
+            run_concurrently(lambda: 1, not_found)
+
+    @override_settings(CONCURRENT_QUERIES=True)
+    def test_pool_threads_keep_connections(self):
+        def open_connection():
+            connections['default'].ensure_connection()
+            return connections['default']
+
+        _, pool_connection = run_concurrently(lambda: None, open_connection)
+        # Соединение потока пула осталось открытым для следующих задач
+        self.assertIsNotNone(pool_connection.connection)
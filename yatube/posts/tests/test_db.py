@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.core.signals import request_started
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+class SQLitePragmasTests(TestCase):
+    def query_pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connection(self):
+        '''
+        Новое соединение получает настройки из SQLITE_PRAGMAS.
+        '''
+        # synchronous=NORMAL хранится как 1
+        self.assertEqual(self.query_pragma('synchronous'), 1)
+        self.assertEqual(self.query_pragma('busy_timeout'), 20000)
+        self.assertEqual(self.query_pragma('cache_size'), -20000)
+
+
+class HealthCheckTests(TestCase):
+    def test_unusable_connection_closed_on_request_start(self):
+        with mock.patch.object(connection, 'is_usable', return_value=False):
+            with mock.patch.object(connection, 'close') as close:
+                request_started.send(sender=self.__class__)
+        close.assert_called_with()
+
+    @override_settings(DB_HEALTH_CHECKS=False)
+    def test_health_checks_disabled(self):
+        with mock.patch.object(connection, 'is_usable') as is_usable:
+            request_started.send(sender=self.__class__)
+        is_usable.assert_not_called()
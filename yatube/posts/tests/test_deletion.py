@@ -0,0 +1,168 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.archive import get_author_months, get_group_months
+from posts.deletion import purge, purge_deleted, soft_delete
+from posts.deletion import soft_delete_user
+from posts.export import export_chunks
+from posts.follow_state import get_follow_state
+from posts.models import (Comment, DigestEvent, Follow, Group, GroupStats,
+                          Post, User, UserDeletion)
+
+
+class SoftDeleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Удаление', slug='test-deletion', description='-'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='test_deleted_author')
+        self.reader = User.objects.create(username='test_deleted_reader')
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.author, group=self.group
+        )
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+
+    def test_post_is_hidden(self):
+        '''
+        Мягко удалённый пост скрыт и убран из счётчиков, но строка осталась.
+        '''
+        soft_delete(self.post)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(get_author_months(self.author.pk), [])
+        self.assertEqual(get_group_months(self.group.pk), [])
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.post_count, 0)
+        response = Client().get(
+            reverse('posts:post', args=[self.author.username, self.post.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_comments_are_hidden(self):
+        soft_delete(self.post)
+        self.assertFalse(Comment.objects.exists())
+        export = b''.join(export_chunks('comments', 'csv')).decode()
+        self.assertNotIn('Комментарий', export)
+
+    def test_user_follows_are_removed(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            get_follow_state(None, self.reader.pk).following_count, 1
+        )
+        soft_delete_user(self.author)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(
+            get_follow_state(None, self.reader.pk).following_count, 0
+        )
+        # Комментарии читателя к постам удалённого автора тоже скрыты
+        self.assertFalse(Comment.objects.exists())
+
+    def test_comment_is_hidden(self):
+        soft_delete(self.comment)
+        response = Client().get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(response.context['page'][0].comment_count, 0)
+        self.assertFalse(self.post.comments.exists())
+
+    def test_user_is_hidden(self):
+        soft_delete_user(self.author)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertTrue(UserDeletion.objects.filter(user=self.author).exists())
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertEqual(get_group_months(self.group.pk), [])
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 0
+        )
+        response = Client().get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_purge_removes_dependents_in_batches(self):
+        for _ in range(4):
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='Ещё'
+            )
+        DigestEvent.objects.create(
+            recipient=self.author, kind=DigestEvent.COMMENT,
+            post=self.post, comment=self.comment
+        )
+        soft_delete(self.post)
+        batches = []
+        deleted = purge(
+            Post.all_objects.filter(pk=self.post.pk),
+            batch_size=2,
+            progress=lambda model, count: batches.append((model, count))
+        )
+        self.assertEqual(deleted, 8)
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertFalse(DigestEvent.objects.exists())
+        self.assertTrue(all(count <= 2 for _, count in batches))
+        self.assertEqual(batches[-1], (Post, 1))
+
+    def test_purge_deleted_respects_retention(self):
+        live = Post.objects.create(text='Живой пост', author=self.author)
+        soft_delete(self.post)
+        self.assertEqual(purge_deleted()['posts'], 0)
+        self.assertEqual(purge_deleted(retention=0)['posts'], 3)
+        self.assertEqual(list(Post.all_objects.all()), [live])
+        # Пост уже убран из архива при мягком удалении
+        [(_, count)] = get_author_months(self.author.pk)
+        self.assertEqual(count, 1)
+
+    def test_purge_deleted_user(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        soft_delete_user(self.author)
+        out = StringIO()
+        call_command('purge_deleted', retention=0, stdout=out)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Post.all_objects.exists())
+        self.assertIn('posts.Post: 1', out.getvalue())
+
+    def test_marker_kept_when_user_purge_fails(self):
+        '''
+        Отметка удаления пропадает только вместе с пользователем.
+        '''
+        soft_delete_user(self.reader)
+        delete = QuerySet.delete
+
+        def failing_delete(queryset):
+            if queryset.model is User:
+                raise DatabaseError
+            return delete(queryset)
+
+        with mock.patch.object(QuerySet, 'delete', failing_delete):
+            with self.assertRaises(DatabaseError):
+                purge(User.objects.filter(pk=self.reader.pk))
+        self.assertTrue(UserDeletion.objects.filter(user=self.reader).exists())
+
+    def test_admin_deletes_user_softly(self):
+        admin = User.objects.create_superuser(
+            'test_deleted_admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.post(
+            reverse('admin:auth_user_delete', args=[self.author.pk]),
+            {'post': 'yes'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertTrue(UserDeletion.objects.filter(user=self.author).exists())
@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from posts import digests
+from posts.models import Comment, DigestEvent, Follow, Post, User
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(
+            username='test_digest_author', email='author@yatube.ru'
+        )
+        cls.followers = [
+            User.objects.create(
+                username=f'test_follower_{i}', email=f'f{i}@yatube.ru'
+            )
+            for i in range(5)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=follower, author=cls.author)
+            for follower in cls.followers
+        )
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.author
+        )
+
+    def test_fan_out_in_batches(self):
+        '''
+        Событие о посте создаётся для каждого подписчика.
+        '''
+        created = digests.fan_out_post(self.post.pk, batch_size=2)
+        self.assertEqual(created, len(self.followers))
+        self.assertEqual(
+            set(DigestEvent.objects.values_list('recipient_id', flat=True)),
+            {follower.pk for follower in self.followers}
+        )
+
+    def test_fan_out_resumes(self):
+        '''
+        Повторный запуск не дублирует уже созданные события.
+        '''
+        digests.fan_out_post(self.post.pk, batch_size=2)
+        DigestEvent.objects.filter(
+            recipient__in=self.followers[3:]
+        ).delete()
+        self.assertEqual(digests.fan_out_post(self.post.pk), 2)
+        self.assertEqual(DigestEvent.objects.count(), len(self.followers))
+
+    def test_comment_event_for_post_author(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.followers[0], text='Комментарий'
+        )
+        digests.add_comment_event(comment.pk)
+        own_comment = Comment.objects.create(
+            post=self.post, author=self.author, text='Ответ'
+        )
+        digests.add_comment_event(own_comment.pk)
+        event = DigestEvent.objects.get()
+        self.assertEqual(event.recipient, self.author)
+        self.assertEqual(event.kind, DigestEvent.COMMENT)
+
+    @override_settings(DIGEST_MAX_ITEMS=2)
+    def test_send_one_digest_per_recipient(self):
+        '''
+        Каждый получатель получает одно письмо, события удаляются.
+        '''
+        for _ in range(3):
+            post = Post.objects.create(text='Ещё пост', author=self.author)
+            digests.fan_out_post(post.pk)
+
+        with mock.patch.object(
+            mail.get_connection().__class__, 'open'
+        ) as open_connection:
+            sent = digests.send_digests(batch_size=2)
+
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(sent, len(self.followers))
+        self.assertEqual(len(mail.outbox), len(self.followers))
+        self.assertIn('И ещё событий: 1', mail.outbox[0].body)
+        self.assertFalse(DigestEvent.objects.exists())
+
+    def test_batch_queries_do_not_grow_with_recipients(self):
+        digests.fan_out_post(self.post.pk)
+        # Получатели пачки, их события с постами, активные пользователи,
+        # удаление событий и пустая следующая пачка
+        with self.assertNumQueries(5):
+            digests.send_digests(batch_size=10)
+        self.assertEqual(len(mail.outbox), len(self.followers))
+
+    def test_inactive_users_get_nothing(self):
+        inactive = self.followers[0]
+        User.objects.filter(pk=inactive.pk).update(is_active=False)
+        digests.fan_out_post(self.post.pk)
+        self.assertFalse(
+            DigestEvent.objects.filter(recipient=inactive).exists()
+        )
+        DigestEvent.objects.create(
+            recipient=inactive, kind=DigestEvent.POST, post=self.post
+        )
+        digests.send_digests()
+        self.assertNotIn(
+            [inactive.email], [message.to for message in mail.outbox]
+        )
+        self.assertFalse(DigestEvent.objects.exists())
@@ -0,0 +1,111 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.export import export_chunks
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_export_user')
+        cls.other = User.objects.create(username='test_export_other')
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество', slug='test-export', description='-'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}, "с кавычками"', author=cls.user,
+                group=cls.group if i % 2 else None
+            )
+            for i in range(5)
+        ]
+        Post.objects.create(text='Чужой пост', author=cls.other)
+        Comment.objects.create(post=cls.posts[1], author=cls.other, text='Ок')
+        Follow.objects.create(user=cls.other, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def read_csv(self, data):
+        return list(csv.reader(io.StringIO(data)))
+
+    def test_batches_with_keyset(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = b''.join(
+                export_chunks('posts', 'csv', user='test_export_user',
+                              batch_size=2)
+            ).decode()
+        rows = self.read_csv(data)
+        self.assertEqual(
+            rows[0], ['id', 'author__username', 'group__slug', 'pub_date',
+                      'text']
+        )
+        self.assertEqual(
+            [int(row[0]) for row in rows[1:]],
+            sorted(post.pk for post in self.posts)
+        )
+        self.assertEqual(rows[1][4], self.posts[0].text)
+        # Пачки по два id и пустая в конце, без OFFSET
+        self.assertEqual(len(queries), 4)
+        self.assertNotIn('OFFSET', queries[-1]['sql'])
+
+    def test_filters(self):
+        data = b''.join(
+            export_chunks('comments', 'ndjson', group='test-export')
+        ).decode()
+        rows = [json.loads(line) for line in data.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['author__username'], 'test_export_other')
+
+    def test_streaming_endpoint(self):
+        url = reverse('posts:export', kwargs={'kind': 'posts', 'fmt': 'csv'})
+        response = self.client.get(url, {'user': self.user.username})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = self.read_csv(b''.join(response.streaming_content).decode())
+        self.assertEqual(len(rows), 6)
+
+        response = self.client.get(
+            url, {'user': self.user.username, 'gzip': '1'}
+        )
+        self.assertIn('posts.csv.gz', response['Content-Disposition'])
+        data = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(self.read_csv(data.decode())), 6)
+
+    def test_endpoint_permissions(self):
+        url = reverse(
+            'posts:export', kwargs={'kind': 'follows', 'fmt': 'ndjson'}
+        )
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, {'user': self.other.username})
+        self.assertEqual(response.status_code, 403)
+        bad = reverse('posts:export', kwargs={'kind': 'users', 'fmt': 'csv'})
+        response = self.client.get(bad, {'user': self.user.username})
+        self.assertEqual(response.status_code, 404)
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command('export_data', 'follows', stdout=stdout)
+        self.assertEqual(self.read_csv(stdout.getvalue())[1][1:], [
+            'test_export_other', 'test_export_user'
+        ])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.ndjson.gz')
+            call_command(
+                'export_data', 'posts', format='ndjson', output=path,
+                gzip=True, stderr=io.StringIO()
+            )
+            with gzip.open(path, 'rt') as f:
+                self.assertEqual(len(f.readlines()), 6)
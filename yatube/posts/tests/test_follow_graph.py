@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from posts.follow_graph import (FollowGraph, get_follow_graph, intersect,
+                                request_rebuild)
+from posts.models import Follow, User
+
+
+class FollowGraphTests(SimpleTestCase):
+    def setUp(self):
+        self.graph = FollowGraph.from_edges([
+            (1, 2), (1, 3), (1, 4), (2, 1), (2, 3), (3, 1), (5, 3),
+        ])
+
+    def test_adjacency_is_sorted(self):
+        self.assertEqual(list(self.graph.following(1)), [2, 3, 4])
+        self.assertEqual(list(self.graph.followers(3)), [1, 2, 5])
+        self.assertEqual(list(self.graph.followers(42)), [])
+
+    def test_counts_and_lookups(self):
+        self.assertEqual(self.graph.following_count(1), 3)
+        self.assertEqual(self.graph.followers_count(3), 3)
+        self.assertTrue(self.graph.is_following(5, 3))
+        self.assertFalse(self.graph.is_following(3, 5))
+
+    def test_intersections(self):
+        self.assertEqual(self.graph.common_following(1, 2), [3])
+        self.assertEqual(self.graph.common_followers(1, 3), [2])
+        self.assertEqual(self.graph.mutual(1), [2, 3])
+        self.assertEqual(intersect([1, 5, 9], list(range(0, 100, 3))), [9])
+
+    def test_add_and_remove(self):
+        self.graph.add(4, 1)
+        self.graph.add(4, 1)
+        self.assertEqual(list(self.graph.followers(1)), [2, 3, 4])
+        self.graph.remove(5, 3)
+        self.assertEqual(list(self.graph.followers(3)), [1, 2])
+        self.assertEqual(self.graph.edge_count, 7)
+
+
+class FollowGraphSignalsTests(TestCase):
+    def test_graph_follows_database(self):
+        '''
+        Построенный граф обновляется сигналами подписки и отписки.
+        '''
+        cache.clear()
+        user = User.objects.create(username='test_graph_user')
+        author = User.objects.create(username='test_graph_author')
+        request_rebuild()
+        graph = get_follow_graph()
+        self.assertFalse(graph.is_following(user.pk, author.pk))
+
+        follow = Follow.objects.create(user=user, author=author)
+        self.assertTrue(get_follow_graph().is_following(user.pk, author.pk))
+        follow.delete()
+        self.assertFalse(get_follow_graph().is_following(user.pk, author.pk))
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase
+from posts.follow_state import FollowState, get_follow_state, get_follow_states
+from posts.models import Follow, User
+
+
+class FollowStateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.viewer = User.objects.create(username='test_viewer')
+        cls.authors = [
+            User.objects.create(username=f'test_author_{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=cls.viewer, author=cls.authors[0])
+        Follow.objects.create(user=cls.authors[1], author=cls.authors[0])
+        Follow.objects.create(user=cls.authors[0], author=cls.authors[1])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_state_in_one_query_then_cached(self):
+        '''
+        Состояние подписки и счётчики берутся одним запросом, затем из кэша.
+        '''
+        author = self.authors[0]
+        with self.assertNumQueries(1):
+            state = get_follow_state(self.viewer.pk, author.pk)
+        self.assertEqual(state, FollowState(True, 2, 1))
+        with self.assertNumQueries(0):
+            get_follow_state(self.viewer.pk, author.pk)
+
+    def test_batch_in_one_query(self):
+        ids = [author.pk for author in self.authors]
+        with self.assertNumQueries(1):
+            states = get_follow_states(self.viewer.pk, ids)
+        self.assertEqual(states[ids[0]], FollowState(True, 2, 1))
+        self.assertEqual(states[ids[1]], FollowState(False, 1, 1))
+        self.assertEqual(states[ids[2]], FollowState(False, 0, 0))
+
+    def test_anonymous_viewer(self):
+        state = get_follow_state(None, self.authors[0].pk)
+        self.assertEqual(state, FollowState(False, 2, 1))
+
+    def test_follow_invalidates_cache(self):
+        author = self.authors[2]
+        get_follow_state(self.viewer.pk, author.pk)
+        follow = Follow.objects.create(user=self.viewer, author=author)
+        self.assertEqual(
+            get_follow_state(self.viewer.pk, author.pk),
+            FollowState(True, 1, 0)
+        )
+        follow.delete()
+        self.assertEqual(
+            get_follow_state(self.viewer.pk, author.pk),
+            FollowState(False, 0, 0)
+        )
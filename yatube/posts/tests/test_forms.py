@@ -9,6 +9,7 @@ from django.test import Client, TestCase
 from django.urls import reverse
 from posts.forms import PostForm
 from posts.models import Group, Post, User
+from taskqueue.models import Task
 
 
 class PostCreateFormTests(TestCase):
@@ -88,6 +89,12 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(new_post.image, f"posts/{form_data['image']}")
         self.assertEqual(Post.objects.count(), self.count_post + 1)
         self.assertEqual(self.group.posts.count(), self.count_group_count + 1)
+        self.assertTrue(
+            Task.objects.filter(
+                name='posts.tasks.generate_thumbnail',
+                payload__contains=str(new_post.pk)
+            ).exists()
+        )
 
     def test_form_page_shows_correct_context(self):
         """Шаблон home сформирован с правильным контекстом."""
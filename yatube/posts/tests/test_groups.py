@@ -0,0 +1,153 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.forms import GroupAutocompleteWidget, PostForm
+from posts.models import Group, GroupStats, Post, User
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create(username=f'test_group_author_{i}')
+            for i in range(2)
+        ]
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество', slug='test-stats', description='-'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другое сообщество', slug='test-other', description='-'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_stats_follow_posts(self):
+        '''
+        Счётчики обновляются при создании, переносе и удалении поста.
+        '''
+        for author in self.authors + self.authors[:1]:
+            post = Post.objects.create(
+                text='Тестовый текст', author=author, group=self.group
+            )
+        stats = self.stats(self.group)
+        self.assertEqual(stats.post_count, 3)
+        self.assertEqual(stats.author_count, 2)
+        self.assertEqual(stats.last_post_at, post.pub_date)
+
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.stats(self.group).post_count, 2)
+        self.assertEqual(self.stats(self.other_group).post_count, 1)
+
+        post.delete()
+        self.assertEqual(self.stats(self.other_group).post_count, 0)
+
+    def test_stats_shift_by_one_post(self):
+        first, second = (
+            Post.objects.create(
+                text='Тестовый текст', author=author, group=self.group
+            )
+            for author in self.authors
+        )
+        second.delete()
+        stats = self.stats(self.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.author_count, 1)
+        self.assertEqual(stats.last_post_at, first.pub_date)
+
+    def test_edit_without_extra_select(self):
+        '''
+        Правка загруженного поста не перечитывает его перед сохранением.
+        '''
+        Post.objects.create(
+            text='Тестовый текст', author=self.authors[0], group=self.group
+        )
+        post = Post.objects.get()
+        post.text = 'Новый текст'
+        with self.assertNumQueries(5):
+            # UPDATE поста, затем в точке сохранения номер прежней
+            # версии под блокировкой строки поста и её запись
+            post.save()
+        self.assertEqual(post.revisions.count(), 1)
+
+    def test_directory_cached_and_invalidated(self):
+        Post.objects.create(
+            text='Тестовый текст', author=self.authors[0], group=self.group
+        )
+        client = Client()
+        response = client.get(reverse('posts:group_index'))
+        self.assertEqual(
+            response.context['groups'], [self.group, self.other_group]
+        )
+        with self.assertNumQueries(0):
+            client.get(reverse('posts:group_index'))
+        Group.objects.create(title='Новое', slug='test-new', description='-')
+        response = client.get(reverse('posts:group_index'))
+        self.assertEqual(len(response.context['groups']), 3)
+
+    def test_group_page_shows_stats(self):
+        Post.objects.create(
+            text='Тестовый текст', author=self.authors[0], group=self.group
+        )
+        response = Client().get(
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        )
+        self.assertContains(response, 'Записей: 1.')
+
+    def test_form_choices_from_cache(self):
+        list(PostForm().fields['group'].choices)
+        with self.assertNumQueries(0):
+            choices = list(PostForm().fields['group'].choices)
+        self.assertEqual(choices, [
+            ('', ''),
+            (self.other_group.pk, self.other_group.title),
+            (self.group.pk, self.group.title),
+        ])
+
+    def test_choices_invalidated_on_group_change(self):
+        list(PostForm().fields['group'].choices)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Переименованное сообщество'
+        group.save()
+        choices = dict(PostForm().fields['group'].choices)
+        self.assertEqual(choices[group.pk], group.title)
+
+    def test_form_validates_group_with_single_query(self):
+        list(PostForm().fields['group'].choices)
+        form = PostForm(data={'text': 'Текст', 'group': self.group.pk})
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], self.group)
+
+    def test_autocomplete_by_prefix(self):
+        url = reverse('posts:groups_autocomplete')
+        response = Client().get(url, {'q': 'Друг'})
+        self.assertEqual(response.json()['results'], [{
+            'id': self.other_group.pk,
+            'title': self.other_group.title,
+            'slug': self.other_group.slug,
+        }])
+        response = Client().get(url, {'q': 'test-'})
+        self.assertEqual(len(response.json()['results']), 2)
+        response = Client().get(url, {'q': ''})
+        self.assertEqual(response.json()['results'], [])
+        long_query = 'Друг ' + 'я' * 300
+        response = Client().get(url, {'q': long_query})
+        self.assertEqual(response.json()['results'], [])
+
+    @override_settings(GROUP_SELECT_LIMIT=1)
+    def test_autocomplete_widget_for_many_groups(self):
+        form = PostForm()
+        self.assertIsInstance(
+            form.fields['group'].widget, GroupAutocompleteWidget
+        )
+        self.assertIn(
+            reverse('posts:groups_autocomplete'), str(form['group'])
+        )
+        form = PostForm(data={'text': 'Текст', 'group': self.group.pk})
+        self.assertTrue(form.is_valid())
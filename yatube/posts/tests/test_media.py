@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 4
+
+
+def public_only(request, path):
+    return not path.startswith('private/')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(MEDIA_ROOT, 'posts'), exist_ok=True)
+        os.makedirs(os.path.join(MEDIA_ROOT, 'private'), exist_ok=True)
+        for name in ('posts/file.bin', 'private/file.bin', 'posts/кот.jpg'):
+            with open(os.path.join(MEDIA_ROOT, name), 'wb') as f:
+                f.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    url = '/media/posts/file.bin'
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response.has_header('ETag'))
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_ranges(self):
+        cases = {
+            'bytes=2-5': (2, 5),
+            'bytes=1000-': (1000, 1023),
+            'bytes=-4': (1020, 1023),
+            'bytes=1020-5000': (1020, 1023),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/1024'
+                )
+                self.assertEqual(
+                    self.body(response), CONTENT[start:end + 1]
+                )
+                self.assertEqual(
+                    response['Content-Length'], str(end - start + 1)
+                )
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag
+        )
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(MEDIA_ACCEL='x-accel-redirect')
+    def test_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/file.bin'
+        )
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_ACCEL='x-accel-redirect')
+    def test_accel_redirect_non_ascii_name(self):
+        response = self.client.get('/media/posts/кот.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/posts/%D0%BA%D0%BE%D1%82.jpg'
+        )
+
+    @override_settings(MEDIA_ACCEL='x-sendfile')
+    def test_sendfile(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(MEDIA_ROOT, 'posts', 'file.bin')
+        )
+
+    @override_settings(
+        MEDIA_ACCESS_CHECK='posts.tests.test_media.public_only'
+    )
+    def test_access_check(self):
+        response = self.client.get('/media/private/file.bin')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_not_found(self):
+        for url in ('/media/posts/missing.bin', '/media/posts/',
+                    '/media/../settings.py'):
+            self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,81 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from posts.models import Group, Post, User
+from posts.prerender import Prerenderer, file_path, get_prerender_paths
+
+PRERENDER_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(PRERENDER_ROOT=PRERENDER_ROOT, PRERENDER_TOP_GROUPS=1)
+class PrerenderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_prerender_author')
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество', slug='test-prerender',
+            description='-'
+        )
+        Post.objects.create(
+            text='Первый пост', author=cls.author, group=cls.group
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PRERENDER_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(PRERENDER_ROOT, ignore_errors=True)
+
+    def test_paths(self):
+        self.assertEqual(get_prerender_paths(), [
+            '/', '/about/author/', '/about/tech/', '/group/test-prerender/'
+        ])
+
+    def test_writes_compressed_pages(self):
+        stats = Prerenderer().run(get_prerender_paths())
+        self.assertEqual(stats['rendered'], 4)
+        filename = file_path('/group/test-prerender/')
+        self.assertEqual(
+            filename,
+            os.path.join(PRERENDER_ROOT, 'group/test-prerender/index.html')
+        )
+        with open(filename, 'rb') as f:
+            html = f.read()
+        self.assertIn('Первый пост', html.decode())
+        with open(filename + '.gz', 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), html)
+
+    def test_rerenders_only_changed_pages(self):
+        paths = get_prerender_paths()
+        Prerenderer().run(paths)
+        prerenderer = Prerenderer()
+        self.assertEqual(prerenderer.run(paths)['rendered'], 0)
+
+        Post.objects.create(
+            text='Второй пост', author=self.author, group=self.group
+        )
+        self.assertIsNotNone(prerenderer.staleness('/group/test-prerender/'))
+        self.assertIsNone(prerenderer.staleness('/about/tech/'))
+        stats = prerenderer.run(paths)
+        self.assertEqual(stats['rendered'], 2)
+        with open(file_path('/group/test-prerender/')) as f:
+            self.assertIn('Второй пост', f.read())
+        self.assertIsNone(prerenderer.staleness('/group/test-prerender/'))
+        # Главная рисуется мимо кэша cache_page и тоже свежая
+        self.assertIsNone(prerenderer.staleness('/'))
+        with open(file_path('/')) as f:
+            self.assertIn('Второй пост', f.read())
+        cache.clear()
+        # Версии тегов потеряны вместе с кэшем: перерисовываются все
+        # страницы с тегами
+        self.assertEqual(prerenderer.run(paths)['rendered'], 2)
+        self.assertEqual(prerenderer.run(paths)['rendered'], 0)
+        self.assertEqual(prerenderer.run(paths, force=True)['rendered'], 4)
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+from yatube.ratelimit import hit, ratelimit_stats
+
+
+@override_settings(RATELIMITS={
+    'posts.new_post': (2, 60),
+    'posts.profile_follow': (1, 60),
+    'users.signup': (1, 60),
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test_ratelimit_user')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_bucket_refills_after_period(self):
+        self.assertEqual(hit('posts.new_post', 'ip:1', now=600), 0)
+        self.assertEqual(hit('posts.new_post', 'ip:1', now=610), 0)
+        self.assertEqual(hit('posts.new_post', 'ip:1', now=615), 45)
+        self.assertEqual(hit('posts.new_post', 'ip:2', now=615), 0)
+        self.assertEqual(hit('posts.new_post', 'ip:1', now=660), 0)
+
+    def test_new_post_limited(self):
+        url = reverse('posts:new_post')
+        for _ in range(2):
+            self.client.post(url, {'text': 'Тестовый текст'})
+        response = self.client.post(url, {'text': 'Тестовый текст'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Post.objects.count(), 2)
+        # Форма по GET лимитом не считается
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(
+            ratelimit_stats()['posts.new_post'],
+            {'allowed': 2, 'blocked': 1}
+        )
+
+    def test_limit_per_user(self):
+        author = User.objects.create(username='test_ratelimit_author')
+        url = reverse(
+            'posts:profile_follow', kwargs={'username': author.username}
+        )
+        self.client.get(url)
+        self.assertEqual(self.client.get(url).status_code, 429)
+        other = Client()
+        other.force_login(author)
+        self.assertEqual(other.get(url).status_code, 302)
+
+    def test_blocked_without_queries(self):
+        url = reverse('users:signup')
+        client = Client()
+        client.post(url)
+        with self.assertNumQueries(0):
+            response = client.post(url)
+        self.assertEqual(response.status_code, 429)
+
+    def test_logged_in_blocked_without_queries(self):
+        url = reverse('posts:new_post')
+        for _ in range(2):
+            self.client.post(url, {'text': 'Тестовый текст'})
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'text': 'Тестовый текст'})
+        self.assertEqual(response.status_code, 429)
+        self.assertNotIn(b'navbar', response.content)
+
+    def test_new_sessions_limited_by_ip(self):
+        url = reverse('posts:new_post')
+        for _ in range(5):
+            client = Client()
+            client.force_login(self.user)
+            for _ in range(2):
+                client.post(url, {'text': 'Тестовый текст'})
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(url, {'text': 'Тестовый текст'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(Post.objects.count(), 10)
+        other = Client(REMOTE_ADDR='10.0.0.2')
+        other.force_login(self.user)
+        response = other.post(url, {'text': 'Тестовый текст'})
+        self.assertEqual(response.status_code, 302)
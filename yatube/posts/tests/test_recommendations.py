@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.follow_graph import request_rebuild
+from posts.models import Follow, Group, Post, Recommendation, User
+from posts.recommendations import (compute_recommendations,
+                                   get_recommendations)
+
+
+class RecommendationsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create(username=f'test_rec_{name}')
+            for name in ('reader', 'friend', 'candidate', 'known', 'poster')
+        }
+        Follow.objects.create(
+            user=cls.users['reader'], author=cls.users['friend']
+        )
+        Follow.objects.create(
+            user=cls.users['reader'], author=cls.users['known']
+        )
+        for name in ('candidate', 'known'):
+            Follow.objects.create(
+                user=cls.users['friend'], author=cls.users[name]
+            )
+        group = Group.objects.create(
+            title='Тестовое сообщество', slug='test-rec', description='-'
+        )
+        for name in ('reader', 'poster'):
+            Post.objects.create(
+                text='Тестовый текст', author=cls.users[name], group=group
+            )
+
+    def setUp(self):
+        cache.clear()
+        # Граф процесса пережил откат базы после прошлого теста
+        request_rebuild()
+
+    def recommended_for(self, name):
+        return list(
+            Recommendation.objects.filter(user=self.users[name])
+                                  .values_list('recommended__username',
+                                               flat=True)
+        )
+
+    def test_friends_of_friends_and_groups(self):
+        '''
+        Рекомендуются авторы друзей и соседи по группам, но не те,
+        на кого пользователь уже подписан.
+        '''
+        compute_recommendations(chunk_size=2)
+        self.assertEqual(
+            self.recommended_for('reader'),
+            ['test_rec_candidate', 'test_rec_poster']
+        )
+
+    def test_recompute_replaces_rows(self):
+        compute_recommendations()
+        compute_recommendations()
+        self.assertEqual(len(self.recommended_for('reader')), 2)
+
+    def test_follow_removes_recommendation(self):
+        compute_recommendations()
+        Follow.objects.create(
+            user=self.users['reader'], author=self.users['candidate']
+        )
+        self.assertEqual(self.recommended_for('reader'), ['test_rec_poster'])
+
+    def test_follow_reaches_process_graph(self):
+        compute_recommendations()
+        follow = Follow.objects.create(
+            user=self.users['reader'], author=self.users['candidate']
+        )
+        compute_recommendations()
+        self.assertEqual(self.recommended_for('reader'), ['test_rec_poster'])
+        follow.delete()
+        compute_recommendations()
+        self.assertEqual(
+            self.recommended_for('reader'),
+            ['test_rec_candidate', 'test_rec_poster']
+        )
+
+    def test_inactive_users_not_recommended(self):
+        compute_recommendations()
+        User.objects.filter(pk=self.users['poster'].pk).update(
+            is_active=False
+        )
+        self.assertEqual(
+            [
+                row.recommended.username
+                for row in get_recommendations(self.users['reader'].pk)
+            ],
+            ['test_rec_candidate']
+        )
+        compute_recommendations()
+        self.assertEqual(
+            self.recommended_for('reader'), ['test_rec_candidate']
+        )
+
+    def test_profile_widget(self):
+        compute_recommendations()
+        client = Client()
+        client.force_login(self.users['reader'])
+        address = reverse(
+            'posts:profile', kwargs={'username': 'test_rec_friend'}
+        )
+        # Отдельный запрос — список месяцев архива, пока он не в кэше
+        with self.assertNumQueries(7):
+            response = client.get(address)
+        self.assertContains(response, 'Кого читать')
+        self.assertContains(response, '@test_rec_candidate')
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Post, User
+from posts.rendering import RENDERER_VERSION
+
+
+class RenderedTextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_render_author')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_html_is_stored_on_save(self):
+        post = Post.objects.create(
+            text='<b>жирный</b>\nвторая строка', author=self.author
+        )
+        self.assertEqual(
+            post.text_html, '&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка'
+        )
+        self.assertEqual(post.text_html_version, RENDERER_VERSION)
+        post.text = 'новый\nтекст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'новый<br>текст')
+
+    def test_queryset_update_keeps_html_in_sync(self):
+        post = Post.objects.create(text='Текст', author=self.author)
+        Post.objects.filter(pk=post.pk).update(text='новый\nтекст')
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'новый<br>текст')
+        Post.all_objects.update(text=Concat('text', Value('!')))
+        post.refresh_from_db()
+        self.assertEqual(post.text_html_version, 0)
+        self.assertEqual(post.html, 'новый<br>текст!')
+
+    def test_pages_use_stored_html(self):
+        post = Post.objects.create(text='Текст поста', author=self.author)
+        Comment.objects.create(
+            post=post, author=self.author, text='Текст комментария'
+        )
+        Post.objects.update(text_html='<i>готовый пост</i>')
+        Comment.objects.update(text_html='<i>готовый комментарий</i>')
+        response = Client().get(
+            reverse('posts:post', args=[self.author.username, post.pk])
+        )
+        self.assertContains(response, '<i>готовый пост</i>')
+        self.assertContains(response, '<i>готовый комментарий</i>')
+
+    def test_old_rows_are_backfilled(self):
+        '''
+        Записи без сохранённого HTML рендерятся при показе, пока их
+        не пересчитает render_texts.
+        '''
+        Post.objects.bulk_create(
+            Post(text=f'<{i}>\n', author=self.author) for i in range(5)
+        )
+        post = Post.objects.first()
+        self.assertEqual(post.text_html, '')
+        self.assertEqual(post.html, f'&lt;{post.text[1]}&gt;<br>')
+
+        out = StringIO()
+        call_command('render_texts', batch_size=2, stdout=out)
+        self.assertIn('posts.Post: 5', out.getvalue())
+        self.assertFalse(
+            Post.objects.exclude(text_html_version=RENDERER_VERSION).exists()
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, f'&lt;{post.text[1]}&gt;<br>')
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+from yatube.replicas import ReplicaRouter, get_read_alias, use_read_alias
+
+REPLICA = 'replica'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    '''
+    Реплика — отдельный файл SQLite, в который ничего не копируется,
+    то есть реплика «отстаёт» от основной базы бесконечно.
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.replica_dir, 'replica.sqlite3'),
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create(username='test_replica')
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.user
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_feed_reads_from_replica(self):
+        '''
+        Профиль читается с реплики, где автора ещё нет.
+        '''
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_writer_reads_own_writes(self):
+        '''
+        После записи сессия читает с основной базы.
+        '''
+        self.client.post(reverse('posts:new_post'), {'text': 'Новый пост'})
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['post_count'], 2)
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        self.client.post(reverse('posts:new_post'), {'text': 'Новый пост'})
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_reads_outside_requests_use_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), 'default')
+        with use_read_alias(REPLICA):
+            self.assertEqual(router.db_for_read(Post), REPLICA)
+            self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertEqual(get_read_alias(), 'default')
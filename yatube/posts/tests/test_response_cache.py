@@ -0,0 +1,137 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.checks import check_shared_cache
+from posts.models import Group, Post, User
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_respcache_author')
+        cls.other = User.objects.create(username='test_respcache_other')
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество', slug='test-respcache',
+            description='-'
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        )
+
+    def test_anonymous_hit_without_queries(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['Content-Type'], response['Content-Type'])
+
+    def test_key_ignores_unknown_params(self):
+        self.client.get(self.url)
+        for query in ('?page=1', '?utm_source=mail'):
+            response = self.client.get(self.url + query)
+            self.assertEqual(response['X-Cache'], 'HIT')
+        response = self.client.get(self.url + '?page=2')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_authenticated_not_cached(self):
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.url)
+        response = client.get(self.url)
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_purge_by_tags(self):
+        group_url = reverse(
+            'posts:group_posts', kwargs={'slug': self.group.slug}
+        )
+        post_url = reverse('posts:post', kwargs={
+            'username': self.author.username, 'post_id': self.post.pk
+        })
+        for url in (self.url, group_url, post_url):
+            self.client.get(url)
+        Post.objects.create(
+            text='Второй пост', author=self.author, group=self.group
+        )
+        for url in (self.url, group_url):
+            response = self.client.get(url)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            self.assertContains(response, 'Второй пост')
+        # В карточке автора на странице поста тоже число записей
+        self.assertEqual(self.client.get(post_url)['X-Cache'], 'MISS')
+        other_url = reverse(
+            'posts:profile', kwargs={'username': self.other.username}
+        )
+        self.client.get(other_url)
+        Post.objects.create(text='Третий пост', author=self.author)
+        self.assertEqual(self.client.get(other_url)['X-Cache'], 'HIT')
+
+    def test_index_fresh_after_purge(self):
+        '''
+        Сброс тегов не упирается в копию cache_page на главной.
+        '''
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.create(text='Свежий пост', author=self.author)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Свежий пост')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+    @override_settings(RESPONSE_CACHE_ROUTES={'posts:profile': 0})
+    def test_stale_while_revalidate(self):
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        scheduled = []
+        with mock.patch(
+            'yatube.response_cache.schedule', side_effect=scheduled.append
+        ):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Cache'], 'STALE')
+            self.assertContains(response, 'Первый пост')
+            # Пока страница обновляется, второй поток не запускается
+            self.client.get(self.url)
+        self.assertEqual(len(scheduled), 1)
+        scheduled[0]()
+        with mock.patch('yatube.response_cache.schedule'):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Новый текст')
+
+    def test_deploy_requires_shared_cache(self):
+        [error] = check_shared_cache(None)
+        self.assertEqual(error.id, 'posts.E001')
+        shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/tmp/yatube-cache',
+        }}
+        with self.settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_degraded_page_not_cached(self):
+        with self.settings(ADMISSION_DEGRADE_IN_FLIGHT=0):
+            response = self.client.get(self.url)
+        self.assertTrue(response.wsgi_request.degraded)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertFalse(response.wsgi_request.degraded)
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+    def test_stale_admission_copy_not_cached(self):
+        self.client.get(self.url)
+        Post.objects.create(text='Второй пост', author=self.author)
+        with self.settings(ADMISSION_DEGRADE_IN_FLIGHT=0):
+            response = self.client.get(self.url)
+        self.assertIn('Stale', response['Warning'])
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Второй пост')
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post, PostRevision, User
+from posts.revisions import apply_delta, get_revision_text, make_delta
+
+
+class RevisionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_revision_author')
+        cls.reader = User.objects.create(username='test_revision_reader')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Первая версия поста', author=self.author
+        )
+
+    def edit(self, text):
+        self.post.text = text
+        self.post.save()
+
+    def test_delta_round_trip(self):
+        source = 'Строка  с пробелами\n\nи абзацем. ' * 20
+        target = source.replace('абзацем', 'новым абзацем', 3) + 'Конец.'
+        self.assertEqual(
+            apply_delta(target, make_delta(target, source)), source
+        )
+
+    @override_settings(POST_REVISION_SNAPSHOT_EVERY=3)
+    def test_every_version_is_restored(self):
+        '''
+        Любая прежняя версия собирается одним запросом к истории.
+        '''
+        versions = [self.post.text]
+        for number in range(2, 9):
+            self.edit(f'{versions[-1]} Правка {number}.')
+            versions.append(self.post.text)
+        self.assertEqual(self.post.revisions.count(), 7)
+        self.assertEqual(
+            list(
+                self.post.revisions.filter(is_snapshot=True)
+                                   .values_list('number', flat=True)
+            ),
+            [6, 3]
+        )
+        for number, text in enumerate(versions[:-1], start=1):
+            with self.subTest(number=number):
+                with self.assertNumQueries(1):
+                    self.assertEqual(
+                        get_revision_text(self.post, number), text
+                    )
+        with self.assertRaises(PostRevision.DoesNotExist):
+            get_revision_text(self.post, 8)
+
+    def test_only_text_changes_are_recorded(self):
+        group = Group.objects.create(
+            title='Правки', slug='test-revisions', description='-'
+        )
+        self.post.group = group
+        self.post.save()
+        self.assertFalse(self.post.revisions.exists())
+        self.assertTrue(self.post.updated_at > self.post.pub_date)
+        self.assertFalse(self.post.edited)
+        self.edit('Вторая версия поста')
+        self.assertTrue(Post.objects.get(pk=self.post.pk).edited)
+
+    def test_history_page(self):
+        self.edit('Вторая версия поста')
+        address = reverse(
+            'posts:post_history', args=[self.author.username, self.post.pk]
+        )
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(address, {'version': 1})
+        self.assertEqual(response.context['text'], 'Первая версия поста')
+        self.assertEqual(response.context['current'], 2)
+        self.assertEqual(
+            client.get(address, {'version': 5}).status_code, 404
+        )
+
+        client.force_login(self.reader)
+        response = client.get(address)
+        self.assertRedirects(
+            response,
+            reverse('posts:post', args=[self.author.username, self.post.pk])
+        )
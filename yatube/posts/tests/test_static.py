@@ -0,0 +1,86 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.utils.http import http_date
+from yatube.storage import CompressedManifestStaticFilesStorage
+
+SOURCE_DIR = tempfile.mkdtemp()
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = b'body { color: #333; }\n' * 100
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, STATICFILES_DIRS=[SOURCE_DIR])
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE_DIR, 'css'), exist_ok=True)
+        with open(os.path.join(SOURCE_DIR, 'css', 'app.css'), 'wb') as f:
+            f.write(CSS)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed_name = staticfiles_storage.stored_name('css/app.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SOURCE_DIR, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_hashed_and_compressed(self):
+        self.assertNotEqual(self.hashed_name, 'css/app.css')
+        template = Template("{% load static %}{% static 'css/app.css' %}")
+        self.assertEqual(
+            template.render(Context()), f'/static/{self.hashed_name}'
+        )
+        for name in ('css/app.css', self.hashed_name):
+            with open(os.path.join(STATIC_ROOT, name + '.gz'), 'rb') as f:
+                self.assertEqual(gzip.decompress(f.read()), CSS)
+
+    def test_missing_manifest_falls_back(self):
+        storage = CompressedManifestStaticFilesStorage(location=SOURCE_DIR)
+        self.assertEqual(storage.hashed_files, {})
+        self.assertEqual(
+            storage.stored_name('css/missing.css'), 'css/missing.css'
+        )
+
+    def test_serves_compressed_immutable(self):
+        client = Client()
+        with self.assertNumQueries(0):
+            response = client.get(
+                f'/static/{self.hashed_name}', HTTP_ACCEPT_ENCODING='gzip'
+            )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), CSS
+        )
+
+    def test_serves_plain_file(self):
+        response = Client().get(
+            '/static/css/app.css', HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(b''.join(response.streaming_content), CSS)
+
+        last_modified = response['Last-Modified']
+        response = Client().get(
+            '/static/css/app.css', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+        response = Client().get(
+            '/static/css/app.css', HTTP_IF_MODIFIED_SINCE=http_date(0)
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_found(self):
+        for path in ('/static/css/nope.css', '/static/../settings.py'):
+            self.assertEqual(Client().get(path).status_code, 404)
@@ -0,0 +1,135 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, GroupScore, Post, PostScore
+from posts.models import User
+from posts import trending
+from posts.trending import (bump, current_weight, flush_views, prune,
+                            trending_scores)
+
+
+@override_settings(
+    TRENDING_WEIGHTS={'view': 1, 'comment': 3, 'follow': 2},
+    TRENDING_FLUSH_INTERVAL=0
+)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_trending_author')
+        cls.reader = User.objects.create(username='test_trending_reader')
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество', slug='test-trending', description='-'
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Просмотры, накопленные другими тестами этого процесса
+        trending._views.clear()
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.author, group=self.group
+        )
+
+    def score_of(self, post):
+        return round(current_weight(PostScore.objects.get(post=post).score), 3)
+
+    def test_events_update_scores(self):
+        '''
+        Комментарий, подписка и просмотр увеличивают рейтинг поста.
+        '''
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        self.assertEqual(self.score_of(self.post), 3)
+        group_score = GroupScore.objects.get(group=self.group).score
+        self.assertAlmostEqual(current_weight(group_score), 3, places=3)
+
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.score_of(self.post), 5)
+
+        client = Client()
+        client.force_login(self.reader)
+        client.get(reverse('posts:post', kwargs={
+            'username': self.author.username, 'post_id': self.post.pk
+        }))
+        self.assertEqual(self.score_of(self.post), 6)
+
+    @override_settings(TRENDING_FLUSH_INTERVAL=60)
+    def test_views_are_buffered(self):
+        '''
+        Просмотры не пишут в базу на каждый показ, а записываются пачкой.
+        '''
+        address = reverse('posts:post', kwargs={
+            'username': self.author.username, 'post_id': self.post.pk
+        })
+        flush_views()
+        client = Client()
+        client.force_login(self.reader)
+        for _ in range(3):
+            client.get(address)
+        self.assertFalse(PostScore.objects.filter(post=self.post).exists())
+        # Три просмотра — одна запись рейтинга поста и одна сообщества,
+        # плюс проверка, что они ещё существуют
+        with self.assertNumQueries(10):
+            flush_views()
+        self.assertEqual(self.score_of(self.post), 3)
+
+    @override_settings(TRENDING_HALF_LIFE=100, TRENDING_MIN_SCORE=1)
+    def test_decay(self):
+        now = 1.6e9
+        bump(self.post.pk, self.group.pk, 8, now=now)
+        bump(self.post.pk, self.group.pk, 8, now=now + 100)
+        other = Post.objects.create(text='Другой', author=self.author)
+        bump(other.pk, None, 1, now=now)
+        prune(now=now + 100)
+        score = PostScore.objects.get(post=self.post).score
+        self.assertAlmostEqual(current_weight(score, now=now + 200), 6)
+        self.assertFalse(PostScore.objects.filter(post=other).exists())
+
+    def test_cursor_pagination(self):
+        posts = [self.post] + [
+            Post.objects.create(text='Текст', author=self.author)
+            for _ in range(4)
+        ]
+        for post in posts:
+            bump(post.pk, None, 1)
+        seen = []
+        cursor = None
+        while True:
+            scores, cursor = trending_scores(cursor, per_page=2)
+            seen.extend(score.post_id for score in scores)
+            if cursor is None:
+                break
+        self.assertEqual(
+            seen, sorted((post.pk for post in posts), reverse=True)
+        )
+
+    @override_settings(TRENDING_HALF_LIFE=100)
+    def test_cursor_survives_time(self):
+        '''
+        Прошедшее время и удаление остывших рейтингов не ломают
+        курсор следующей страницы.
+        '''
+        now = 1.6e9
+        posts = [self.post] + [
+            Post.objects.create(text='Текст', author=self.author)
+            for _ in range(3)
+        ]
+        for weight, post in enumerate(posts, start=1):
+            bump(post.pk, None, weight, now=now)
+        first, cursor = trending_scores(per_page=2)
+        prune(now=now + 150)
+        fresh = Post.objects.create(text='Свежий', author=self.author)
+        bump(fresh.pk, None, 0.1, now=now + 150)
+        second, _ = trending_scores(cursor, per_page=2)
+        self.assertEqual(
+            [score.post_id for score in first + second],
+            [post.pk for post in reversed(posts)]
+        )
+
+    def test_trending_page(self):
+        bump(self.post.pk, self.group.pk, 1)
+        response = Client().get(reverse('posts:trending'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['posts'], [self.post])
+        self.assertEqual(response.context['groups'], [self.group])
+        response = Client().get(reverse('posts:trending') + '?cursor=bad')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.db.models import F, QuerySet
+from django.test import TestCase
+from posts.models import Group, GroupScore
+from posts.upsert import upsert
+
+
+class UpsertTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество', slug='test-upsert', description='-'
+        )
+
+    def score(self):
+        return GroupScore.objects.get(group=self.group).score
+
+    def test_update_or_create(self):
+        lookup = {'group': self.group}
+        changes = {'score': F('score') + 1}
+        upsert(GroupScore, lookup, changes)
+        self.assertFalse(GroupScore.objects.exists())
+        upsert(GroupScore, lookup, changes, {'score': 5})
+        upsert(GroupScore, lookup, changes, {'score': 5})
+        self.assertEqual(self.score(), 6)
+
+    def test_row_created_concurrently(self):
+        '''
+        Строка, созданная между update и insert, обновляется.
+        '''
+        update = QuerySet.update
+
+        def late_update(queryset, **kwargs):
+            if not GroupScore.objects.exists():
+                # Параллельный запрос вставил строку после нашего update
+                GroupScore.objects.create(group=self.group, score=5)
+                return 0
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', late_update):
+            upsert(
+                GroupScore, {'group': self.group},
+                {'score': F('score') + 1}, {'score': 1}
+            )
+        self.assertEqual(self.score(), 6)
@@ -4,7 +4,9 @@ import tempfile
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from posts.models import Comment, Follow, Group, Post, User
 
@@ -446,3 +448,137 @@ class CommentViewsTests(PostViewTests, TestCase):
             text=form_data['text']
         ).exists()
         self.assertTrue(comment_is_created)
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_feed_queries')
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество',
+            slug='test-slug-feed',
+            description='Тестовое описание сообщества'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def create_posts(self, count):
+        for _ in range(count):
+            post = Post.objects.create(
+                text='Тестовый текст',
+                author=self.user,
+                group=self.group
+            )
+            Comment.objects.create(post=post, author=self.user, text='Ок')
+
+    def count_queries(self, address):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(address)
+        return len(queries)
+
+    def test_feed_queries_do_not_grow_with_posts(self):
+        '''
+        Число запросов ленты не зависит от количества постов на странице.
+        '''
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        self.create_posts(1)
+        before = {
+            address: self.count_queries(address) for address in addresses
+        }
+        self.create_posts(9)
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertEqual(self.count_queries(address), before[address])
+
+    def test_feed_shows_comment_count(self):
+        self.create_posts(1)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page'][0].comment_count, 1)
+        self.assertContains(response, 'Комментариев: 1')
+
+
+class TemplateProfilingTests(TestCase):
+    @override_settings(TEMPLATE_PROFILING=True)
+    def test_server_timing_header(self):
+        '''
+        В режиме профилирования ответ содержит время шаблонов и include.
+        '''
+        cache.clear()
+        user = User.objects.create(username='test_profiling')
+        Post.objects.create(text='Тестовый текст', author=user)
+        response = Client().get(reverse('posts:index'))
+        self.assertIn('template:posts/index.html', response['Server-Timing'])
+        self.assertIn(
+            'include:posts/post_item.html', response['Server-Timing']
+        )
+
+    def test_no_header_without_profiling(self):
+        response = Client().get(reverse('about:author'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+@override_settings(COMMENTS_STREAM_THRESHOLD=3, STREAM_CHUNK_SIZE=2)
+class PostStreamingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test_streaming')
+        cls.post = Post.objects.create(text='Тестовый текст', author=cls.user)
+        cls.url = reverse('posts:post', kwargs={
+            'username': cls.user.username, 'post_id': cls.post.pk
+        })
+
+    def setUp(self):
+        cache.clear()
+
+    def create_comments(self, count):
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Комментарий {i}')
+            for i in range(count)
+        )
+        return list(
+            self.post.comments.order_by('-created', '-pk')
+                              .values_list('pk', flat=True)
+        )
+
+    def test_short_discussion_rendered_at_once(self):
+        self.create_comments(3)
+        response = Client().get(self.url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.context['comments']), 3)
+
+    def test_long_discussion_streamed(self):
+        '''
+        Начало страницы отправляется до комментариев, комментарии идут
+        пачками в том же порядке, что и без потока.
+        '''
+        comment_ids = self.create_comments(7)
+        response = Client().get(self.url)
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('Тестовый текст', chunks[0])
+        self.assertNotIn('comment_', chunks[0])
+        self.assertIn('Об авторе', chunks[-1])
+        # Начало, четыре пачки по два комментария и меньше, конец
+        self.assertEqual(len(chunks), 6)
+        html = ''.join(chunks)
+        positions = [html.index(f'name="comment_{pk}"') for pk in comment_ids]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_new_comment_does_not_shift_stream(self):
+        comment_ids = self.create_comments(7)
+        response = Client().get(self.url)
+        # Комментарий, добавленный после первой выборки, не сдвигает
+        # продолжение потока
+        Comment.objects.create(post=self.post, author=self.user, text='Новый')
+        html = b''.join(response.streaming_content).decode()
+        for pk in comment_ids:
+            self.assertEqual(html.count(f'name="comment_{pk}"'), 1)
@@ -0,0 +1,173 @@
+import base64
+import binascii
+import math
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Abs, Greatest, Log, Power
+
+from .models import GroupScore, PostScore
+from .upsert import upsert
+
+GROUPS_CACHE_KEY = 'trending:groups'
+
+# Рейтинг хранится как log2 суммы весов событий, приведённых к EPOCH:
+# событие в момент t весит weight * 2 ** ((t - EPOCH) / TRENDING_HALF_LIFE).
+# Старые события так же теряют половину веса за период полураспада,
+# но сохранённые значения со временем не меняются: порядок постов
+# и курсоры страниц остаются верными без пересчёта всей таблицы.
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def event_score(weight, now=None):
+    now = time.time() if now is None else now
+    return math.log2(weight) + (now - EPOCH) / settings.TRENDING_HALF_LIFE
+
+
+def current_weight(score, now=None):
+    """
+    Сумма весов событий рейтинга с учётом затухания к моменту now.
+    """
+    now = time.time() if now is None else now
+    return 2 ** (score - (now - EPOCH) / settings.TRENDING_HALF_LIFE)
+
+
+def _log_add(value):
+    # log2(2 ** score + 2 ** value) без переполнения
+    value = Value(value, output_field=FloatField())
+    two = Value(2.0, output_field=FloatField())
+    return Greatest(F('score'), value) + Log(
+        two, 1 + Power(two, -Abs(F('score') - value))
+    )
+
+
+def _bump(model, lookup, value):
+    upsert(model, lookup, {'score': _log_add(value)}, {'score': value})
+
+
+def bump(post_id, group_id, weight, now=None):
+    """
+    Добавляет вес события к рейтингу поста и его сообщества.
+    """
+    value = event_score(weight, now)
+    _bump(PostScore, {'post_id': post_id}, value)
+    if group_id is not None:
+        _bump(GroupScore, {'group_id': group_id}, value)
+
+
+_views = Counter()
+_views_lock = threading.Lock()
+_views_flushed = time.monotonic()
+
+
+def record_view(post_id, group_id):
+    """
+    Учитывает просмотр поста. Просмотры копятся в памяти процесса
+    и записываются пачкой не чаще раза в TRENDING_FLUSH_INTERVAL
+    секунд, чтобы страница поста не писала в базу на каждый показ.
+    """
+    global _views_flushed
+    with _views_lock:
+        _views[(post_id, group_id)] += 1
+        due = (
+            time.monotonic() - _views_flushed
+            >= settings.TRENDING_FLUSH_INTERVAL
+        )
+        if due:
+            _views_flushed = time.monotonic()
+    if due:
+        flush_views()
+
+
+def flush_views(now=None):
+    """
+    Записывает накопленные просмотры: по одному UPDATE на пост
+    и сообщество за всю пачку.
+    """
+    with _views_lock:
+        views = _views.copy()
+        _views.clear()
+    weight = settings.TRENDING_WEIGHTS['view']
+    posts = Counter()
+    groups = Counter()
+    for (post_id, group_id), count in views.items():
+        posts[post_id] += count
+        if group_id is not None:
+            groups[group_id] += count
+    for model, field, counts in (
+        (PostScore, 'post_id', posts),
+        (GroupScore, 'group_id', groups),
+    ):
+        # Пост или сообщество могли удалить, пока просмотры копились
+        target = model._meta.get_field(field).related_model
+        existing = target._base_manager.filter(pk__in=counts).values_list(
+            'pk', flat=True
+        )
+        for pk in existing:
+            _bump(model, {field: pk}, event_score(weight * counts[pk], now))
+    return len(views)
+
+
+def prune(now=None):
+    """
+    Удаляет остывшие рейтинги: те, что сейчас меньше TRENDING_MIN_SCORE.
+    Остальные записи не меняются.
+    """
+    threshold = event_score(settings.TRENDING_MIN_SCORE, now)
+    deleted = 0
+    for model in (PostScore, GroupScore):
+        deleted += model.objects.filter(score__lt=threshold).delete()[0]
+    cache.delete(GROUPS_CACHE_KEY)
+    return deleted
+
+
+def encode_cursor(score):
+    raw = f'{score.score!r}:{score.post_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        score, post_id = raw.split(':')
+        return float(score), int(post_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+
+
+def trending_scores(cursor=None, per_page=10):
+    """
+    Страница рейтинга постов после курсора и курсор следующей страницы.
+    Курсор — пара (рейтинг, id) последнего поста, поэтому выборка идёт
+    по индексу без OFFSET.
+    """
+    scores = PostScore.objects.all()
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        score, post_id = position
+        scores = scores.filter(
+            Q(score__lt=score) | Q(score=score, post_id__lt=post_id)
+        )
+    scores = list(scores[:per_page + 1])
+    next_cursor = None
+    if len(scores) > per_page:
+        scores = scores[:per_page]
+        next_cursor = encode_cursor(scores[-1])
+    return scores, next_cursor
+
+
+def trending_groups():
+    groups = cache.get(GROUPS_CACHE_KEY)
+    if groups is None:
+        groups = [
+            score.group for score in GroupScore.objects.select_related(
+                'group'
+            )[:settings.TRENDING_GROUPS_SHOWN]
+        ]
+        cache.set(GROUPS_CACHE_KEY, groups, settings.TRENDING_CACHE_TIMEOUT)
+    return groups
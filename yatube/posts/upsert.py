@@ -0,0 +1,17 @@
+from django.db import IntegrityError, transaction
+
+
+def upsert(model, lookup, changes, defaults=None):
+    """
+    Применяет changes к строке model, найденной по lookup. Если строки
+    нет, а defaults задан, создаёт её с полями lookup и defaults.
+    """
+    rows = model.objects.filter(**lookup)
+    if rows.update(**changes) or defaults is None:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults)
+    except IntegrityError:
+        # Строку успел создать параллельный запрос
+        rows.update(**changes)
@@ -16,11 +16,36 @@ urlpatterns = [
         views.index,
         name='index'
     ),
+    path(
+        'trending/',
+        views.trending,
+        name='trending'
+    ),
+    path(
+        'groups/',
+        views.group_index,
+        name='group_index'
+    ),
+    path(
+        'groups/autocomplete/',
+        views.groups_autocomplete,
+        name='groups_autocomplete'
+    ),
     path(
         'group/<slug:slug>/',
         views.group_posts,
         name='group_posts'
     ),
+    path(
+        'group/<slug:slug>/<int:year>/<int:month>/',
+        views.group_posts,
+        name='group_archive'
+    ),
+    path(
+        'export/<slug:kind>.<slug:fmt>',
+        views.export,
+        name='export'
+    ),
     path(
         'new/',
         views.new_post,
@@ -31,6 +56,11 @@ urlpatterns = [
         views.profile,
         name='profile'
     ),
+    path(
+        '<str:username>/archive/<int:year>/<int:month>/',
+        views.profile,
+        name='profile_archive'
+    ),
     path(
         '<str:username>/<int:post_id>/',
         views.post_view,
@@ -41,6 +71,11 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        '<str:username>/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
     path(
         '<str:username>/<int:post_id>/comment',
         views.add_comment,
@@ -1,12 +1,31 @@
+from itertools import chain
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
-from django.db.models import Count
+from django.db.models import Count, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.views.decorators.cache import cache_page
-
+from taskqueue.queue import enqueue
+from yatube.admission import is_degraded
+from yatube.compression import compress_stream
+from yatube.ratelimit import ratelimit
+from yatube.response_cache import add_cache_tags, cache_tags, page_cache
+
+from .archive import get_author_months, get_group_months, month_range
+from .concurrency import run_concurrently
+from .export import ExportError, export_chunks
+from .follow_state import get_follow_state
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .groups import get_directory, search_groups
+from .models import Comment, Follow, Group, Post, PostRevision, User
+from .recommendations import get_recommendations
+from .revisions import get_revision_text
+from .streaming import render_stream
+from .tasks import add_comment_event, fan_out_post, generate_thumbnail
+from .trending import record_view, trending_groups, trending_scores
 
 PER_PAGE = 10
 
@@ -17,6 +36,42 @@ def make_pagination(request, object_list, per_page):
     return paginator.get_page(page_number)
 
 
+def filter_month(queryset, year, month):
+    """
+    Посты за месяц архива: диапазон по pub_date вместо глубокого OFFSET.
+    """
+    if year is None:
+        return queryset, None
+    try:
+        start, end = month_range(year, month)
+    except ValueError:
+        raise Http404
+    return queryset.filter(pub_date__gte=start, pub_date__lt=end), start
+
+
+def make_evaluated_page(request, object_list, per_page):
+    """
+    Страница с уже загруженными объектами: запрос выполняется там,
+    где вызвана функция, а не при рендере шаблона.
+    """
+    page = make_pagination(request, object_list, per_page)
+    page.object_list = list(page.object_list)
+    return page
+
+
+def feed_queryset(queryset, with_counts=True):
+    """
+    Подтягивает автора, группу и число комментариев одним запросом,
+    чтобы карточки постов не делали запросов при рендере.
+    """
+    queryset = queryset.select_related('author', 'group')
+    if not with_counts:
+        return queryset
+    return queryset.annotate(comment_count=Count(
+        'comments', filter=Q(comments__deleted_at__isnull=True)
+    ))
+
+
 def page_not_found(request, exception):
     return render(
         request,
@@ -30,68 +85,165 @@ def server_error(request):
     return render(request, 'errors/500.html', status=500)
 
 
-@cache_page(20, key_prefix='index_page')
+@cache_tags('feed')
+@page_cache(20, key_prefix='index_page')
 def index(request):
-    post_list = Post.objects.all()
+    post_list = feed_queryset(Post.objects.all())
     page = make_pagination(request, post_list, 10)
     context = {'page': page}
 
     return render(request, 'posts/index.html', context)
 
 
-def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page = make_pagination(request, posts, 10)
-    context = {'group': group, 'page': page}
+def trending(request):
+    cursor = request.GET.get('cursor')
+    scores, next_cursor = trending_scores(cursor, PER_PAGE)
+    posts = feed_queryset(
+        Post.objects.filter(pk__in=[score.post_id for score in scores])
+    ).in_bulk()
+    context = {
+        'posts': [
+            posts[score.post_id] for score in scores
+            if score.post_id in posts
+        ],
+        'next_cursor': next_cursor,
+        'groups': trending_groups()
+    }
+
+    return render(request, 'posts/trending.html', context)
+
+
+def group_index(request):
+    context = {'groups': get_directory()}
+
+    return render(request, 'posts/groups.html', context)
+
+
+def groups_autocomplete(request):
+    results = search_groups(request.GET.get('q', ''))
+
+    return JsonResponse({'results': results})
+
+
+def group_posts(request, slug, year=None, month=None):
+    group = get_object_or_404(
+        Group.objects.select_related('stats'),
+        slug=slug
+    )
+    add_cache_tags(request, f'group:{group.pk}')
+    posts, archive_month = filter_month(group.posts.all(), year, month)
+    page = make_pagination(request, feed_queryset(posts), 10)
+    context = {
+        'group': group,
+        'page': page,
+        'archive': get_group_months(group.pk),
+        'archive_month': archive_month,
+        'archive_url': 'posts:group_archive',
+        'archive_owner': group.slug,
+    }
 
     return render(request, 'group.html', context)
 
 
-def profile(request, username):
+def profile(request, username, year=None, month=None):
     author = get_object_or_404(
         User,
-        username=username
+        username=username,
+        is_active=True
     )
-    posts = author.posts.all()
-    post_count = posts.count()
-    page = make_pagination(request, posts, 10)
-    user = request.user
-    is_following = (
-        user.is_authenticated
-        and author.following.filter(user__username=user.username).exists()
+    add_cache_tags(request, f'author:{author.pk}')
+    viewer_id = request.user.pk
+    degraded = is_degraded(request)
+    posts, archive_month = filter_month(author.posts.all(), year, month)
+    page, follow_state, recommendations = run_concurrently(
+        lambda: make_evaluated_page(
+            request,
+            feed_queryset(posts, with_counts=not degraded),
+            10
+        ),
+        lambda: get_follow_state(viewer_id, author.pk),
+        lambda: viewer_id and not degraded and get_recommendations(
+            viewer_id
+        ),
     )
+    archive = get_author_months(author.pk)
+    if archive_month is None:
+        post_count = page.paginator.count
+    else:
+        post_count = sum(count for _, count in archive)
 
     context = {
         'profile': author,
         'page': page,
         'post_count': post_count,
-        'is_following': is_following
+        'is_following': follow_state.is_following,
+        'follow_state': follow_state,
+        'recommendations': recommendations,
+        'archive': archive,
+        'archive_month': archive_month,
+        'archive_url': 'posts:profile_archive',
+        'archive_owner': author.username,
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_view(request, username, post_id):
-    profile = get_object_or_404(
-        User.objects.annotate(posts_count=Count('posts')),
-        username=username
+    threshold = settings.COMMENTS_STREAM_THRESHOLD
+    comment_list = Comment.objects.filter(
+        post_id=post_id, post__author__username=username
+    ).select_related('author').order_by('-created', '-pk')
+    profile, post, comments = run_concurrently(
+        lambda: get_object_or_404(
+            User.objects.annotate(posts_count=Count(
+                'posts', filter=Q(posts__deleted_at__isnull=True)
+            )),
+            username=username
+        ),
+        lambda: get_object_or_404(
+            feed_queryset(Post.objects.filter(author__username=username)),
+            pk=post_id
+        ),
+        lambda: list(comment_list[:threshold + 1]),
     )
-    post = get_object_or_404(profile.posts, pk=post_id)
+    add_cache_tags(request, f'author:{profile.pk}', f'post:{post.pk}')
     post_count = profile.posts_count
     form = CommentForm()
-    comments = post.comments.all()
+    follow_state = get_follow_state(request.user.pk, profile.pk)
+    if request.user.pk != profile.pk:
+        record_view(post.pk, post.group_id)
 
     context = {
         'profile': profile,
         'post': post,
         'post_count': post_count,
         'comments': comments,
-        'form': form
+        'form': form,
+        'is_following': follow_state.is_following,
+        'follow_state': follow_state
     }
+    if len(comments) > threshold:
+        # Длинное обсуждение отправляется по частям, не собираясь
+        # целиком в памяти. Продолжение — после последнего уже
+        # прочитанного комментария, а не по OFFSET: новые комментарии
+        # встают в начало и сдвинули бы смещение
+        last = comments[-1]
+        rest = comment_list.filter(
+            Q(created__lt=last.created)
+            | Q(created=last.created, pk__lt=last.pk)
+        )
+        comments = chain(
+            comments,
+            rest.iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+        )
+        return render_stream(
+            request, 'posts/post.html', context, 'comments', comments,
+            'posts/comment_item.html', settings.STREAM_CHUNK_SIZE
+        )
 
     return render(request, 'posts/post.html', context)
 
 
+@ratelimit('posts.add_comment')
 @login_required
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, pk=post_id)
@@ -101,6 +253,7 @@ def add_comment(request, username, post_id):
         comment.post = post
         comment.author = request.user
         comment.save()
+        enqueue(add_comment_event, comment_id=comment.pk)
         path = reverse(
             'posts:post',
             kwargs={'username': username, 'post_id': post_id}
@@ -116,6 +269,7 @@ def add_comment(request, username, post_id):
     return render(request, 'posts/comments.html', context)
 
 
+@ratelimit('posts.new_post')
 @login_required
 def new_post(request):
     form = PostForm(
@@ -127,6 +281,9 @@ def new_post(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image:
+            enqueue(generate_thumbnail, post_id=post.pk)
+        enqueue(fan_out_post, post_id=post.pk)
         return redirect('posts:index')
 
     context = {
@@ -158,6 +315,8 @@ def post_edit(request, username, post_id):
 
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data and post.image:
+            enqueue(generate_thumbnail, post_id=post.pk)
         return redirect(path)
 
     context = {
@@ -170,18 +329,46 @@ def post_edit(request, username, post_id):
     return render(request, 'posts/new_post.html', context)
 
 
+@login_required
+def post_history(request, username, post_id):
+    """
+    Версии поста с датами правок. История видна только автору.
+    """
+    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    if request.user.pk != post.author_id:
+        return redirect('posts:post', username=username, post_id=post_id)
+    revisions = list(post.revisions.values_list('number', 'created'))
+    current = revisions[0][0] + 1 if revisions else 1
+    selected = request.GET.get('version', '')
+    selected = int(selected) if selected.isdigit() else current
+    text = post.text
+    if selected != current:
+        try:
+            text = get_revision_text(post, selected)
+        except PostRevision.DoesNotExist:
+            raise Http404
+    context = {
+        'post': post,
+        'revisions': revisions,
+        'current': current,
+        'selected': selected,
+        'text': text,
+    }
+    return render(request, 'posts/history.html', context)
+
+
 @login_required
 def follow_index(request):
-    post_list = (
-        Post.objects.prefetch_related('author')
-                    .prefetch_related('author__following')
-                    .filter(author__following__user=request.user)
+    post_list = feed_queryset(
+        Post.objects.filter(author__following__user=request.user),
+        with_counts=not is_degraded(request)
     )
     page = make_pagination(request, post_list, 10)
     context = {'page': page}
     return render(request, 'posts/follow.html', context)
 
 
+@ratelimit('posts.profile_follow', methods=('GET', 'POST'))
 @login_required
 def profile_follow(request, username):
     path = reverse('posts:profile', kwargs={'username': username})
@@ -201,3 +388,35 @@ def profile_unfollow(request, username):
     follow = get_object_or_404(Follow, user=user, author=author)
     follow.delete()
     return redirect(path)
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+@ratelimit('posts.export', methods=('GET',))
+@login_required
+def export(request, kind, fmt):
+    """
+    Потоковая выгрузка постов, комментариев или подписок.
+    Обычный пользователь может выгрузить только свои данные.
+    """
+    user = request.GET.get('user')
+    group = request.GET.get('group')
+    if not request.user.is_staff and user != request.user.username:
+        raise PermissionDenied
+    try:
+        chunks = export_chunks(kind, fmt, user=user, group=group)
+    except ExportError:
+        raise Http404
+    filename = f'{kind}.{fmt}'
+    content_type = EXPORT_CONTENT_TYPES[fmt]
+    if request.GET.get('gzip'):
+        chunks = compress_stream(chunks, 'gzip')
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
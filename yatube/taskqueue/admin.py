@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = [
+        'pk', 'name', 'status', 'attempts', 'run_at', 'created', 'worker'
+    ]
+    search_fields = ['name']
+    list_filter = ['status', 'name']
+    empty_value_display = '-пусто-'
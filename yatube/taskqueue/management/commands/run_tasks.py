@@ -0,0 +1,89 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from taskqueue.queue import (autodiscover, claim, execute, requeue_crashed,
+                             requeue_stale)
+
+
+def init_worker():
+    django.setup()
+    autodiscover()
+
+
+class Command(BaseCommand):
+    help = (
+        'Обработчик фоновых задач: забирает задачи пачками и выполняет '
+        'их в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.TASKS_PROCESSES,
+            help='Размер пула процессов, 0 — выполнять в этом процессе.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TASKS_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать очередь до конца и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        autodiscover()
+        self.executor = None
+        if options['processes']:
+            self.executor = self.make_executor(options['processes'])
+        try:
+            self.loop(options)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+
+    def make_executor(self, processes):
+        # Дочерние процессы не должны унаследовать открытые соединения
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=processes, initializer=init_worker
+        )
+
+    def run_batch(self, ids, options):
+        if self.executor is None:
+            return [execute(task_id) for task_id in ids]
+        connections.close_all()
+        try:
+            return list(self.executor.map(execute, ids))
+        except BrokenProcessPool:
+            # Задача убила процесс пула: остаток пачки возвращаем
+            # в очередь, а пул создаём заново
+            self.stderr.write('Процесс пула упал, пул пересоздан')
+            self.executor.shutdown(wait=False)
+            self.executor = self.make_executor(options['processes'])
+            requeue_crashed(ids)
+            return [False] * len(ids)
+
+    def loop(self, options):
+        processed = failed = 0
+        while True:
+            requeue_stale(settings.TASKS_RUNNING_TIMEOUT)
+            ids = claim(options['batch_size'])
+            if not ids:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            results = self.run_batch(ids, options)
+            processed += len(results)
+            failed += results.count(False)
+        self.stdout.write(
+            f'Обработано задач: {processed}, с ошибкой: {failed}'
+        )
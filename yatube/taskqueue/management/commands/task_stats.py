@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from taskqueue.queue import queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает глубину очереди задач и задержку обработки.'
+
+    def handle(self, *args, **options):
+        stats = queue_stats()
+        for status in ('pending', 'running', 'failed'):
+            self.stdout.write(f'{status}: {stats[status]}')
+        self.stdout.write(f'lag: {stats["lag"]:.1f} s')
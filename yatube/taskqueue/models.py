@@ -0,0 +1,56 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField(
+        max_length=200
+    )
+    payload = models.TextField(
+        default='{}'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now
+    )
+    created = models.DateTimeField(
+        auto_now_add=True
+    )
+    started = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    worker = models.CharField(
+        max_length=64,
+        blank=True
+    )
+    last_error = models.TextField(
+        blank=True
+    )
+
+    class Meta:
+        ordering = ['run_at']
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'], name='task_status_run_at_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} ({self.status})'
@@ -0,0 +1,153 @@
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger('yatube.tasks')
+
+_registry = {}
+
+
+def task(func):
+    """
+    Регистрирует функцию как фоновую задачу под именем
+    "<модуль>.<функция>". Аргументы задачи — JSON-совместимые kwargs.
+    """
+    _registry[f'{func.__module__}.{func.__name__}'] = func
+    return func
+
+
+def autodiscover():
+    autodiscover_modules('tasks')
+
+
+def get_task_function(name):
+    if name not in _registry:
+        autodiscover()
+    return _registry[name]
+
+
+def enqueue(func, **kwargs):
+    """
+    Ставит задачу в очередь и возвращает её запись.
+
+    При TASKS_ALWAYS_EAGER задача выполняется сразу в текущем процессе.
+    """
+    name = func if isinstance(func, str) else (
+        f'{func.__module__}.{func.__name__}'
+    )
+    if settings.TASKS_ALWAYS_EAGER:
+        get_task_function(name)(**kwargs)
+        return None
+    return Task.objects.create(name=name, payload=json.dumps(kwargs))
+
+
+def claim(batch_size):
+    """
+    Помечает до batch_size готовых к запуску задач как выполняемые
+    и возвращает их id. Метка worker не даёт двум обработчикам забрать
+    одну и ту же задачу.
+    """
+    now = timezone.now()
+    worker = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(
+            Task.objects.filter(status=Task.PENDING, run_at__lte=now)
+                        .order_by('run_at')
+                        .values_list('pk', flat=True)[:batch_size]
+        )
+        Task.objects.filter(pk__in=ids, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            worker=worker,
+            started=now,
+            attempts=F('attempts') + 1,
+        )
+    return list(
+        Task.objects.filter(worker=worker).values_list('pk', flat=True)
+    )
+
+
+def execute(task_id):
+    """
+    Выполняет задачу. Успешная задача удаляется, упавшая возвращается
+    в очередь с экспоненциальной задержкой, пока не кончатся попытки.
+    """
+    task_record = Task.objects.get(pk=task_id)
+    try:
+        func = get_task_function(task_record.name)
+        func(**json.loads(task_record.payload))
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Task %s failed:\n%s', task_record, error)
+        if task_record.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            status, run_at = Task.FAILED, task_record.run_at
+        else:
+            delay = settings.TASKS_RETRY_DELAY * 2 ** task_record.attempts
+            status = Task.PENDING
+            run_at = timezone.now() + timedelta(seconds=delay)
+        Task.objects.filter(pk=task_id).update(
+            status=status, run_at=run_at, worker='', last_error=error
+        )
+        return False
+    Task.objects.filter(pk=task_id).delete()
+    return True
+
+
+def _requeue(running, error):
+    """
+    Возвращает выполнявшиеся задачи в очередь, а исчерпавшие попытки
+    помечает упавшими: иначе задача, которая вешает или роняет
+    обработчик, повторялась бы бесконечно.
+    """
+    failed = running.filter(
+        attempts__gte=settings.TASKS_MAX_ATTEMPTS
+    ).update(status=Task.FAILED, worker='', last_error=error)
+    if failed:
+        logger.warning('%s tasks failed: %s', failed, error)
+    return running.update(status=Task.PENDING, worker='')
+
+
+def requeue_stale(timeout):
+    """
+    Возвращает в очередь задачи, чей обработчик завис или упал.
+    """
+    deadline = timezone.now() - timedelta(seconds=timeout)
+    return _requeue(
+        Task.objects.filter(status=Task.RUNNING, started__lt=deadline),
+        f'Задача не завершилась за {timeout} с.'
+    )
+
+
+def requeue_crashed(ids):
+    """
+    Возвращает в очередь задачи из пачки, на которой умер процесс
+    обработчика.
+    """
+    return _requeue(
+        Task.objects.filter(pk__in=ids, status=Task.RUNNING),
+        'Процесс обработчика завершился аварийно.'
+    )
+
+
+def queue_stats():
+    """
+    Глубина очереди по статусам и задержка самой старой готовой задачи.
+    """
+    now = timezone.now()
+    stats = {status: 0 for status, _ in Task.STATUS_CHOICES}
+    for status in stats:
+        stats[status] = Task.objects.filter(status=status).count()
+    oldest = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now
+    ).aggregate(oldest=Min('run_at'))['oldest']
+    stats['lag'] = (now - oldest).total_seconds() if oldest else 0.0
+    return stats
@@ -0,0 +1,116 @@
+import io
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from taskqueue.management.commands.run_tasks import Command
+from taskqueue.models import Task
+from taskqueue.queue import (claim, enqueue, execute, queue_stats,
+                             requeue_crashed, requeue_stale, task)
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task
+def explode():
+    raise ValueError('boom')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_stores_task(self):
+        '''
+        Задача сохраняется в очередь и не выполняется сразу.
+        '''
+        enqueue(remember, value=1)
+        task_record = Task.objects.get()
+        self.assertEqual(task_record.name, f'{__name__}.remember')
+        self.assertEqual(task_record.status, Task.PENDING)
+        self.assertEqual(calls, [])
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode(self):
+        enqueue(remember, value=2)
+        self.assertEqual(calls, [2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_worker_runs_batches(self):
+        for value in range(5):
+            enqueue(remember, value=value)
+        call_command(
+            'run_tasks', once=True, processes=0, batch_size=2,
+            stdout=io.StringIO()
+        )
+        self.assertEqual(calls, [0, 1, 2, 3, 4])
+        self.assertFalse(Task.objects.exists())
+
+    def test_claim_does_not_take_claimed_tasks(self):
+        enqueue(remember, value=1)
+        first = claim(10)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(claim(10), [])
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2)
+    def test_failed_task_is_retried_then_failed(self):
+        enqueue(explode)
+        [task_id] = claim(1)
+        self.assertFalse(execute(task_id))
+        task_record = Task.objects.get(pk=task_id)
+        self.assertEqual(task_record.status, Task.PENDING)
+        self.assertGreater(task_record.run_at, timezone.now())
+        self.assertIn('boom', task_record.last_error)
+
+        Task.objects.filter(pk=task_id).update(run_at=timezone.now())
+        claim(1)
+        execute(task_id)
+        self.assertEqual(Task.objects.get(pk=task_id).status, Task.FAILED)
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2)
+    def test_stuck_task_fails_after_max_attempts(self):
+        '''
+        Задача, на которой зависает обработчик, не повторяется вечно.
+        '''
+        enqueue(remember, value=1)
+        for status in (Task.PENDING, Task.FAILED):
+            claim(1)
+            Task.objects.update(
+                started=timezone.now() - timedelta(seconds=60)
+            )
+            requeue_stale(30)
+            self.assertEqual(Task.objects.get().status, status)
+        self.assertIn('30', Task.objects.get().last_error)
+
+    def test_crashed_batch_is_requeued(self):
+        enqueue(remember, value=1)
+        ids = claim(1)
+        self.assertEqual(requeue_crashed(ids), 1)
+        self.assertEqual(Task.objects.get().status, Task.PENDING)
+
+    def test_broken_pool_is_rebuilt(self):
+        enqueue(remember, value=1)
+        ids = claim(1)
+        command = Command(stdout=io.StringIO(), stderr=io.StringIO())
+        command.executor = broken = mock.Mock()
+        broken.map.side_effect = BrokenProcessPool
+        with mock.patch.object(Command, 'make_executor') as make_executor:
+            results = command.run_batch(ids, {'processes': 2})
+        self.assertEqual(results, [False])
+        self.assertIs(command.executor, make_executor.return_value)
+        self.assertEqual(Task.objects.get().status, Task.PENDING)
+
+    def test_queue_stats(self):
+        enqueue(remember, value=1)
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=30))
+        stats = queue_stats()
+        self.assertEqual(stats['pending'], 1)
+        self.assertGreaterEqual(stats['lag'], 30)
@@ -0,0 +1,186 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from .ratelimit import get_identity
+
+# Вес последнего запроса в скользящем среднем времени работы с базой
+DB_TIME_WEIGHT = 0.2
+
+
+class ViewLoad:
+    """
+    Нагрузка на одно представление в этом процессе: сколько запросов
+    выполняется сейчас и сколько в среднем длится их работа с базой.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.db_time = 0.0
+        self.served_stale = 0
+        self.lock = threading.Lock()
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            return self.in_flight - 1
+
+    def probe(self):
+        """
+        Пропускает к базе каждый ADMISSION_PROBE_EVERY-й запрос, которому
+        досталась бы копия из-за медленной базы: иначе db_time никогда
+        не обновится и страница останется урезанной навсегда.
+        """
+        with self.lock:
+            self.served_stale += 1
+            if self.served_stale < settings.ADMISSION_PROBE_EVERY:
+                return False
+            self.served_stale = 0
+            return True
+
+    def leave(self, db_time):
+        with self.lock:
+            self.in_flight -= 1
+            if db_time is not None:
+                self.db_time += DB_TIME_WEIGHT * (db_time - self.db_time)
+
+
+_loads = {}
+_loads_lock = threading.Lock()
+
+
+def get_load(view_name):
+    load = _loads.get(view_name)
+    if load is None:
+        with _loads_lock:
+            load = _loads.setdefault(view_name, ViewLoad())
+    return load
+
+
+def is_degraded(request):
+    return getattr(request, 'degraded', False)
+
+
+class DBTimer:
+    """
+    Суммарное время запросов к базе. run_concurrently ставит таймер
+    и в потоки пула, поэтому сумма пополняется под блокировкой.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.total += elapsed
+
+
+def stale_key(request):
+    # Копия своя у каждой сессии; сессию не загружаем, чтобы
+    # перегруженный путь не ходил в базу
+    return (
+        f'admission:stale:{get_identity(request)}:{request.get_full_path()}'
+    )
+
+
+class AdmissionControlMiddleware:
+    """
+    Защищает дорогие представления из ADMISSION_VIEWS от перегрузки.
+
+    Пока запросов к представлению меньше ADMISSION_DEGRADE_IN_FLIGHT и
+    среднее время работы с базой ниже ADMISSION_DEGRADE_DB_TIME, оно
+    работает как обычно, а успешный ответ сохраняется в кэш. Выше этих
+    порогов отдаётся сохранённая копия, а если её нет — облегчённая
+    страница (request.degraded) без счётчиков и миниатюр; из-за
+    медленной базы — кроме редких пробных запросов, которые обновляют
+    среднее время. Начиная с
+    ADMISSION_REJECT_IN_FLIGHT запросов сразу отвечаем 503.
+
+    Счётчики свои у каждого процесса: перегрузку видит тот воркер,
+    в который она пришла.
+    """
+
+    def __init__(self, get_response):
+        if not settings.ADMISSION_VIEWS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.degraded = False
+        request.admission_load = None
+        request.admission_measured = False
+        timer = DBTimer()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timer)
+                    )
+                response = self.get_response(request)
+        finally:
+            load = request.admission_load
+            if load is not None:
+                # Копия из кэша о нагрузке на базу ничего не говорит
+                load.leave(
+                    timer.total if request.admission_measured else None
+                )
+
+        if (
+            request.admission_load is not None
+            and not request.degraded
+            and response.status_code == 200
+            and not response.streaming
+        ):
+            cache.set(
+                stale_key(request),
+                (response.content, response['Content-Type']),
+                settings.ADMISSION_STALE_TIMEOUT
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        if request.method != 'GET':
+            return None
+        if view_name not in settings.ADMISSION_VIEWS:
+            return None
+        load = get_load(view_name)
+        in_flight = load.enter()
+        if in_flight >= settings.ADMISSION_REJECT_IN_FLIGHT:
+            load.leave(None)
+            return self.service_unavailable(request)
+        request.admission_load = load
+        if in_flight >= settings.ADMISSION_DEGRADE_IN_FLIGHT or (
+            load.db_time >= settings.ADMISSION_DEGRADE_DB_TIME
+            and not load.probe()
+        ):
+            request.degraded = True
+            cached = cache.get(stale_key(request))
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['Warning'] = '110 - "Response is Stale"'
+                return response
+        request.admission_measured = True
+        return None
+
+    def service_unavailable(self, request):
+        response = HttpResponse(
+            render_to_string('errors/503.html'),
+            status=503
+        )
+        response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER)
+        return response
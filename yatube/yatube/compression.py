@@ -0,0 +1,224 @@
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    # brotli необязателен: без него файлы сжимаются только gzip
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Типы, которые имеет смысл сжимать
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|x-ndjson)|image/svg)'
+)
+
+
+def gzip_compress(data, level=9):
+    # mtime=0: одинаковые данные дают одинаковый архив
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_compress(data, quality=11):
+    return brotli.compress(data, quality=quality)
+
+
+def precompress(data):
+    """
+    Сжатые варианты данных для отдачи с диска: расширение файла
+    и содержимое. Варианты не короче исходных данных пропускаются.
+    """
+    variants = {'.gz': gzip_compress(data)}
+    if brotli is not None:
+        variants['.br'] = brotli_compress(data)
+    return {
+        suffix: content for suffix, content in variants.items()
+        if len(content) < len(data)
+    }
+
+
+class GzipStream:
+    def __init__(self, level):
+        # wbits=31: формат gzip с заголовком
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliStream:
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdStream:
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+STREAMS = {'br': BrotliStream, 'zstd': ZstdStream, 'gzip': GzipStream}
+
+
+def available_encodings():
+    """
+    Кодировки из COMPRESSION_ENCODINGS, для которых есть библиотека,
+    в порядке предпочтения.
+    """
+    installed = {'gzip': True, 'br': brotli, 'zstd': zstandard}
+    return [
+        encoding for encoding in settings.COMPRESSION_ENCODINGS
+        if installed.get(encoding)
+    ]
+
+
+def choose_encoding(request, encodings=None):
+    """
+    Лучшая кодировка из encodings, которую принимает клиент.
+    """
+    accepted = {}
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                continue
+        accepted[coding.strip().lower()] = quality
+    if encodings is None:
+        encodings = available_encodings()
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    """
+    Сжимает данные целиком с уровнем из COMPRESSION_LEVELS.
+    """
+    stream = STREAMS[encoding](settings.COMPRESSION_LEVELS[encoding])
+    return stream.compress(data) + stream.finish()
+
+
+def compress_stream(chunks, encoding):
+    """
+    Сжимает поток по частям. После каждой части данные сбрасываются,
+    чтобы браузер получал страницу по мере рендера.
+    """
+    stream = STREAMS[encoding](settings.COMPRESSION_LEVELS[encoding])
+    for chunk in chunks:
+        data = stream.compress(chunk) + stream.flush()
+        if data:
+            yield data
+    yield stream.finish()
+
+
+def compress_variants(data):
+    """
+    Все доступные сжатые варианты данных для хранения в кэше, чтобы
+    сжимать страницу один раз при заполнении кэша, а не на каждый ответ.
+    """
+    if len(data) < settings.COMPRESSION_MIN_LENGTH:
+        return {}
+    variants = {}
+    for encoding in available_encodings():
+        compressed = compress(data, encoding)
+        if len(compressed) < len(data):
+            variants[encoding] = compressed
+    return variants
+
+
+def is_compressible(response):
+    if response.has_header('Content-Encoding'):
+        return False
+    if response.status_code != 200:
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+        return False
+    if not response.streaming and (
+        len(response.content) < settings.COMPRESSION_MIN_LENGTH
+    ):
+        return False
+    return True
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы лучшей кодировкой из br, zstd и gzip, которую
+    принимает клиент.
+
+    Потоковые ответы сжимаются по частям. Ответы, уже сжатые раньше
+    (статика, страницы из кэша), двоичные типы и короткие ответы
+    пропускаются.
+    """
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENCODINGS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Сжатое тело побайтно отличается от исходного
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,169 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.module_loading import import_string
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    Часть файла от start длиной length для FileResponse. Без fileno(),
+    поэтому сервер читает её через read(), а не отдаёт файл целиком
+    через sendfile.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Диапазон байтов (start, end) включительно из заголовка Range,
+    None — отдать файл целиком, ValueError — диапазон вне файла.
+    Несколько диапазонов сразу не поддерживаются: на них
+    отвечаем всем файлом, это допускает RFC 7233.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500: последние 500 байт
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def check_access(request, path):
+    """
+    Вызывает MEDIA_ACCESS_CHECK(request, path), если он задан.
+    """
+    if settings.MEDIA_ACCESS_CHECK is None:
+        return True
+    return import_string(settings.MEDIA_ACCESS_CHECK)(request, path)
+
+
+def serve_media(request, path):
+    """
+    Отдаёт файл из MEDIA_ROOT с поддержкой Range, If-Modified-Since
+    и ETag.
+
+    При MEDIA_ACCEL = 'x-accel-redirect' или 'x-sendfile' проверяет
+    доступ и заголовки, а сам файл отдаёт фронтовый сервер.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponse(status=405)
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stats = os.stat(fullpath)
+    except OSError:
+        raise Http404
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404
+    if not check_access(request, path):
+        raise PermissionDenied
+
+    etag = quote_etag(f'{stats.st_mtime_ns:x}-{stats.st_size:x}')
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stats.st_mtime)
+    )
+    if response is None:
+        response = file_response(request, fullpath, path, stats, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stats.st_mtime)
+    if settings.MEDIA_ACCESS_CHECK is None:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.MEDIA_MAX_AGE}'
+        )
+    else:
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def file_response(request, fullpath, path, stats, etag):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    if encoding:
+        # Иначе браузер распакует файл, например .tar.gz
+        content_type = 'application/octet-stream'
+
+    # Пути в заголовках экранируются: иначе Django закодирует не-ASCII
+    # имя в MIME (=?utf-8?b?...?=), и фронтовый сервер файл не найдёт.
+    # nginx и mod_xsendfile (XSendFileUnescape) раскодируют %XX сами
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_PREFIX + path
+        )
+        return response
+    if settings.MEDIA_ACCEL == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = quote(fullpath)
+        return response
+
+    size = stats.st_size
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    # If-Range: часть файла, только если он не изменился
+    if range_header and if_range in (
+        None, etag, http_date(stats.st_mtime)
+    ):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    response_file = open(fullpath, 'rb')
+    if byte_range is None:
+        # Весь файл: сервер может отправить его через sendfile
+        response = FileResponse(response_file, content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(response_file, start, length),
+            content_type=content_type,
+            status=206
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    # FileResponse угадывает тип по имени файла, а у части файла его нет
+    response['Content-Type'] = content_type
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,136 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+STATS_KEY = 'ratelimit:stats:{scope}:{result}'
+
+
+def get_identity(request, session=True):
+    """
+    Кого ограничиваем: владельца сессии по cookie, не загружая сессию
+    из базы, а без cookie или при session=False — IP.
+
+    Cookie не проверяется, и выдуманное значение получает свою корзину,
+    поэтому формы для анонимов ограничиваются по IP.
+    """
+    cookie = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session and cookie:
+        return 'session:' + hashlib.md5(cookie.encode()).hexdigest()
+    ip = request.META.get('REMOTE_ADDR', '')
+    if settings.RATELIMIT_TRUST_FORWARDED:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            ip = forwarded.split(',')[0].strip()
+    return f'ip:{ip}'
+
+
+def _count(scope, result):
+    key = STATS_KEY.format(scope=scope, result=result)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен из кэша между add и incr
+        cache.add(key, 1, None)
+
+
+def _take(scope, identity, now, factor=1):
+    capacity, period = settings.RATELIMITS[scope]
+    capacity *= factor
+    window = int(now // period)
+    key = f'ratelimit:{scope}:{identity}:{window}'
+    cache.add(key, 0, period + 1)
+    try:
+        used = cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, period + 1)
+        used = 1
+    if used <= capacity:
+        return 0
+    return max(1, math.ceil((window + 1) * period - now))
+
+
+def hit(scope, identity, now=None, factor=1):
+    """
+    Забирает токен из корзины identity для scope.
+
+    Корзина на capacity * factor токенов целиком наполняется каждые
+    period секунд. Токены списываются атомарным cache.incr, поэтому
+    параллельные запросы не могут взять больше capacity.
+    Возвращает 0, если токен выдан, иначе сколько секунд ждать.
+    """
+    now = time.time() if now is None else now
+    retry_after = _take(scope, identity, now, factor)
+    _count(scope, 'blocked' if retry_after else 'allowed')
+    return retry_after
+
+
+def too_many_requests(retry_after):
+    # Отдельный шаблон без base.html и контекст-процессоров: отказ
+    # не обращается к базе
+    response = HttpResponse(
+        render_to_string('errors/429.html', {'retry_after': retry_after}),
+        status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _check(request, scope, session):
+    now = time.time()
+    identity = get_identity(request, session)
+    retry_after = _take(scope, identity, now)
+    ip = get_identity(request, session=False)
+    if retry_after or ip == identity:
+        return retry_after
+    # Новые сессии ничего не стоят, поэтому у IP своя корзина, больше
+    # сессионной в RATELIMIT_IP_FACTOR раз на случай общего NAT
+    return _take(scope, ip, now, settings.RATELIMIT_IP_FACTOR)
+
+
+def ratelimit(scope, methods=('POST',), session=True):
+    """
+    Ограничивает частоту запросов к представлению лимитом
+    settings.RATELIMITS[scope] на сессию и на IP. Проверка идёт до кода
+    представления, так что отклонённый запрос не трогает ORM.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                settings.RATELIMIT_ENABLED
+                and scope in settings.RATELIMITS
+                and request.method in methods
+            ):
+                retry_after = _check(request, scope, session)
+                _count(scope, 'blocked' if retry_after else 'allowed')
+                if retry_after:
+                    return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def ratelimit_stats():
+    """
+    Сколько запросов пропущено и отклонено по каждому лимиту.
+
+    Счётчики лежат в кэше, поэтому сумма по всем процессам получится
+    только с общим для них бэкендом кэша, как и сами лимиты.
+    """
+    keys = {
+        (scope, result): STATS_KEY.format(scope=scope, result=result)
+        for scope in settings.RATELIMITS
+        for result in ('allowed', 'blocked')
+    }
+    values = cache.get_many(keys.values())
+    stats = {}
+    for (scope, result), key in keys.items():
+        stats.setdefault(scope, {})[result] = values.get(key, 0)
+    return stats
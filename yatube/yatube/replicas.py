@@ -0,0 +1,105 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+# Сессии только что записаны на основной базе и на реплике
+# могут ещё отсутствовать.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = threading.local()
+
+
+def get_read_alias():
+    return getattr(_state, 'alias', PRIMARY)
+
+
+@contextmanager
+def use_read_alias(alias):
+    """
+    Направляет чтения текущего потока в базу alias.
+    """
+    previous = get_read_alias()
+    _state.alias = alias
+    try:
+        yield
+    finally:
+        _state.alias = previous
+
+
+class ReplicaRouter:
+    """
+    Запись всегда идёт в основную базу, чтение — туда, куда его
+    направил ReplicaPinningMiddleware (по умолчанию тоже в основную).
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return PRIMARY
+        return get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    GET-запросы к view из REPLICA_READ_VIEWS читают с реплики.
+
+    После любого запроса на запись браузер получает cookie, и следующие
+    REPLICA_PIN_SECONDS секунд его запросы читают с основной базы,
+    чтобы автор сразу видел свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.alias = PRIMARY
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.alias = PRIMARY
+
+        if request.method not in SAFE_METHODS:
+            pinned_until = time.time() + settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                str(int(pinned_until)),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.should_use_replica(request):
+            _state.alias = random.choice(settings.DATABASE_REPLICAS)
+
+    def should_use_replica(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return False
+        if request.method not in SAFE_METHODS:
+            return False
+        view_name = request.resolver_match.view_name
+        if view_name not in settings.REPLICA_READ_VIEWS:
+            return False
+        return not self.is_pinned(request)
+
+    def is_pinned(self, request):
+        try:
+            pinned_until = int(request.COOKIES[settings.REPLICA_PIN_COOKIE])
+        except (KeyError, ValueError):
+            return False
+        return pinned_until > time.time()
@@ -0,0 +1,270 @@
+import hashlib
+import logging
+import queue
+import threading
+import time
+from functools import wraps
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.cache import cache_page
+
+from .compression import (available_encodings, choose_encoding,
+                          compress_variants)
+
+logger = logging.getLogger(__name__)
+
+TAG_KEY = 'respcache:tag:{}'
+LOCK_KEY = 'respcache:lock:{}'
+
+# Заголовки ответа, которые не сохраняются вместе со страницей:
+# длина зависит от выбранного при отдаче сжатия
+SKIPPED_HEADERS = {'set-cookie', 'content-length', 'content-encoding'}
+
+_revalidations = queue.Queue(maxsize=100)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def add_cache_tags(request, *tags):
+    """
+    Помечает ответ на запрос тегами, по которым его можно сбросить
+    через purge_tags.
+    """
+    request.cache_tags = getattr(request, 'cache_tags', set()) | set(tags)
+
+
+def cache_tags(*tags):
+    """
+    Декоратор: помечает ответы представления постоянными тегами.
+    Ставится над page_cache, чтобы теги были и у ответов из его кэша.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            add_cache_tags(request, *tags)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def page_cache(timeout, **options):
+    """
+    cache_page для запросов, которые не обслуживает
+    ResponseCacheMiddleware. Копия cache_page не сбрасывается через
+    purge_tags: после сброса она вернула бы старую страницу, и та
+    сохранилась бы как свежая.
+    """
+    def decorator(view):
+        cached_view = cache_page(timeout, **options)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if getattr(request, 'response_cached', False):
+                return view(request, *args, **kwargs)
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def purge_tags(*tags):
+    """
+    Сбрасывает все сохранённые страницы с любым из тегов: новая версия
+    тега не совпадёт с той, что записана в странице.
+    """
+    now = time.time_ns()
+    cache.set_many({TAG_KEY.format(tag): now for tag in tags}, None)
+
+
+def get_tag_versions(tags, initial=None):
+    keys = {tag: TAG_KEY.format(tag) for tag in tags}
+    versions = cache.get_many(keys.values())
+    for tag, key in keys.items():
+        if key not in versions:
+            # Версия вытеснена из кэша: новая не совпадёт ни с одной
+            # сохранённой страницей
+            cache.add(key, initial or time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return {tag: versions[key] for tag, key in keys.items()}
+
+
+def is_anonymous(request):
+    """
+    Без cookie сессии и сообщений страница одинакова для всех
+    анонимных посетителей, и Django не нужно даже открывать сессию.
+    """
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def cache_key(view_name, request):
+    params = []
+    for name in sorted(settings.RESPONSE_CACHE_PARAMS):
+        value = request.GET.get(name)
+        if value and not (name == 'page' and value == '1'):
+            params.append((name, value))
+    parts = [view_name, request.path, urlencode(params)]
+    parts.extend(
+        request.META.get(header, '')
+        for header in settings.RESPONSE_CACHE_HEADERS
+    )
+    digest = hashlib.md5('\n'.join(parts).encode()).hexdigest()
+    return f'respcache:page:{digest}'
+
+
+def _run_worker():
+    while True:
+        revalidate = _revalidations.get()
+        try:
+            revalidate()
+        except Exception:
+            logger.exception('Response revalidation failed')
+        finally:
+            connections.close_all()
+
+
+def schedule(revalidate):
+    """
+    Ставит обновление страницы в очередь единственного фонового потока.
+    Если очередь полна, страница обновится при следующем запросе.
+    """
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(
+                    target=_run_worker, name='response-cache', daemon=True
+                )
+                _worker.start()
+    try:
+        _revalidations.put_nowait(revalidate)
+        return True
+    except queue.Full:
+        return False
+
+
+class ResponseCacheMiddleware:
+    """
+    Кэш страниц для анонимных GET-запросов к маршрутам из
+    RESPONSE_CACHE_ROUTES.
+
+    Свежая страница отдаётся из кэша без сессий, представлений и базы.
+    Устаревшая, но не старше RESPONSE_CACHE_STALE, отдаётся сразу,
+    а фоновый поток перерисовывает её копией запроса. Страницы,
+    чьи теги сброшены через purge_tags, считаются отсутствующими.
+    """
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_CACHE_ROUTES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        view_name = self.cacheable_route(request)
+        if view_name is None:
+            return self.get_response(request)
+
+        key = cache_key(view_name, request)
+        ttl = settings.RESPONSE_CACHE_ROUTES[view_name]
+        entry = cache.get(key)
+        if entry is not None and self.is_valid(entry):
+            request.cache_tags = set(entry['tags'])
+            age = time.time() - entry['created']
+            if age < ttl:
+                return self.build_response(request, entry, 'HIT')
+            if cache.add(LOCK_KEY.format(key), 1, ttl + 1):
+                environ = dict(request.environ, **{'wsgi.input': BytesIO()})
+                schedule(lambda: self.store(
+                    key, WSGIRequest(environ), ttl
+                ))
+            return self.build_response(request, entry, 'STALE')
+
+        response, entry = self.store(key, request, ttl)
+        if entry is not None:
+            return self.build_response(request, entry, 'MISS')
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def cacheable_route(self, request):
+        if request.method != 'GET' or not is_anonymous(request):
+            return None
+        try:
+            view_name = resolve(request.path_info).view_name
+        except Resolver404:
+            return None
+        if view_name not in settings.RESPONSE_CACHE_ROUTES:
+            return None
+        return view_name
+
+    def is_valid(self, entry):
+        return get_tag_versions(entry['tags']) == entry['tags']
+
+    def store(self, key, request, ttl):
+        started = time.time_ns()
+        request.response_cached = True
+        response = self.get_response(request)
+        versions = get_tag_versions(
+            getattr(request, 'cache_tags', ()), initial=started - 1
+        )
+        # Тег, сброшенный во время рендера, мог не попасть в страницу
+        purged = any(version > started for version in versions.values())
+        # Ответ из кэша cache_page мог быть нарисован до сброса тегов
+        from_page_cache = (
+            getattr(request, '_cache_update_cache', None) is False
+        )
+        entry = None
+        if (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not purged
+            and not from_page_cache
+            # Облегчённая страница или копия от защиты от перегрузки
+            # не должна достаться всем анонимам
+            and not getattr(request, 'degraded', False)
+            and not response.has_header('Warning')
+        ):
+            entry = {
+                'created': time.time(),
+                'content': response.content,
+                'headers': [
+                    (name, value) for name, value in response.items()
+                    if name.lower() not in SKIPPED_HEADERS
+                ],
+                'tags': versions,
+                # Сжимаем один раз при заполнении кэша
+                'encoded': compress_variants(response.content),
+            }
+            cache.set(key, entry, ttl + settings.RESPONSE_CACHE_STALE)
+        cache.delete(LOCK_KEY.format(key))
+        return response, entry
+
+    def build_response(self, request, entry, state):
+        encodings = [
+            encoding for encoding in available_encodings()
+            if encoding in entry['encoded']
+        ]
+        encoding = choose_encoding(request, encodings)
+        if encoding is None:
+            response = HttpResponse(entry['content'])
+        else:
+            response = HttpResponse(entry['encoded'][encoding])
+        for name, value in entry['headers']:
+            response[name] = value
+        if encodings:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(len(response.content))
+        response['X-Cache'] = state
+        return response
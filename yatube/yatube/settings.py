@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'taskqueue.apps.TaskQueueConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -35,6 +36,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yatube.compression.CompressionMiddleware',
+    'yatube.static_serving.StaticFilesMiddleware',
+    'yatube.response_cache.ResponseCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -42,18 +46,29 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'yatube.template_profiling.TemplateProfilingMiddleware',
+    'yatube.replicas.ReplicaPinningMiddleware',
+    'yatube.admission.AdmissionControlMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
+# Вне DEBUG шаблоны компилируются один раз и берутся из кэша загрузчика
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [
             os.path.join(BASE_DIR, 'templates'),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -65,15 +80,55 @@ TEMPLATES = [
     },
 ]
 
+# Замер времени рендера шаблонов и {% include %} (заголовок Server-Timing)
+TEMPLATE_PROFILING = False
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Независимые запросы страниц profile и post_view выполняются параллельно
+# в ограниченном пуле потоков. Для SQLite выигрыша нет, включать на Postgres.
+CONCURRENT_QUERIES = False
+QUERY_POOL_SIZE = 4
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переиспользуется между запросами до 10 минут
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Реплики только для чтения: алиасы из DATABASES
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['yatube.replicas.ReplicaRouter']
+
+# GET-запросы к этим страницам читают с реплики
+REPLICA_READ_VIEWS = [
+    'posts:index',
+    'posts:group_posts',
+    'posts:profile',
+    'posts:post',
+    'posts:follow_index',
+]
+
+# Сколько секунд после записи браузер читает с основной базы
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_until'
+
+# Перед каждым запросом постоянные соединения проверяются на живость
+DB_HEALTH_CHECKS = True
+
+# Применяются к каждому новому соединению с SQLite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    # Миллисекунды ожидания блокировки записи
+    'busy_timeout': 20000,
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -101,9 +156,26 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# collectstatic добавляет хэш содержимого в имена файлов
+# и кладёт рядом сжатые варианты .gz и .br
+STATICFILES_STORAGE = 'yatube.storage.CompressedManifestStaticFilesStorage'
+# Статику отдаёт StaticFilesMiddleware; файлы с хэшем в имени
+# кэшируются браузером на год, остальные — на STATIC_MAX_AGE секунд
+STATIC_SERVE = True
+STATIC_MAX_AGE = 60
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+# Медиа отдаёт yatube.media.serve_media. MEDIA_ACCEL передаёт отправку
+# файла фронтовому серверу: 'x-accel-redirect' (nginx, internal
+# location MEDIA_ACCEL_PREFIX) или 'x-sendfile' (Apache, lighttpd)
+MEDIA_SERVE = True
+MEDIA_ACCEL = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60 * 24
+# Путь к функции (request, path) -> bool для закрытых файлов
+MEDIA_ACCESS_CHECK = None
 
 # Login
 LOGIN_URL = '/auth/login/'
@@ -114,13 +186,153 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'noreply@yatube.ru'
+
+# Дайджесты: python manage.py send_digests
+DIGEST_SUBJECT = 'Новое на Yatube'
+DIGEST_BATCH_SIZE = 500
+# Сколько событий показывать в одном письме
+DIGEST_MAX_ITEMS = 20
 
+# Фоновые задачи: python manage.py run_tasks
+TASKS_ALWAYS_EAGER = False
+TASKS_PROCESSES = 2
+TASKS_BATCH_SIZE = 20
+TASKS_MAX_ATTEMPTS = 5
+# Задержка перед повтором, удваивается с каждой попыткой
+TASKS_RETRY_DELAY = 10
+# Через сколько секунд зависшая задача возвращается в очередь
+TASKS_RUNNING_TIMEOUT = 600
+
+# Кэш в памяти процесса годится только для разработки: через кэш
+# сбрасываются страницы, граф подписок, списки сообществ и архив,
+# и в бою он должен быть общим для всех воркеров (check --deploy)
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Счётчики подписок и состояние подписки в кэше сбрасываются сигналами
+FOLLOW_STATE_CACHE_TIMEOUT = 60 * 60
+
+# Граф подписок в памяти процесса перестраивается не реже чем раз в
+# столько секунд: изменения из других процессов доходят с этой задержкой
+FOLLOW_GRAPH_MAX_AGE = 5 * 60
+
+# Рекомендации: python manage.py compute_recommendations
+RECOMMENDATIONS_CHUNK_SIZE = 1000
+RECOMMENDATIONS_TOP_K = 20
+# Сколько соседей просматривать на каждом шаге обхода графа
+RECOMMENDATIONS_FANOUT = 30
+# Сколько рекомендаций показывать в профиле
+RECOMMENDATIONS_SHOWN = 5
+
+# «Популярное»: вес событий и период полураспада рейтинга в секундах.
+# Остывшие рейтинги удаляет python manage.py decay_trending, запускаемая
+# по расписанию. Просмотры копятся в памяти процесса и записываются
+# не чаще раза в TRENDING_FLUSH_INTERVAL секунд
+TRENDING_WEIGHTS = {
+    'view': 0.1,
+    'comment': 3,
+    'follow': 2,
+}
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_FLUSH_INTERVAL = 30
+TRENDING_MIN_SCORE = 0.01
+TRENDING_GROUPS_SHOWN = 10
+TRENDING_CACHE_TIMEOUT = 60
+
+# Каталог сообществ и варианты выбора группы в форме поста
+GROUPS_CACHE_TIMEOUT = 60 * 60
+# Больше стольких сообществ форма поста показывает поиск вместо списка
+GROUP_SELECT_LIMIT = 200
+GROUPS_AUTOCOMPLETE_LIMIT = 20
+
+# Список месяцев в архиве автора и сообщества
+ARCHIVE_CACHE_TIMEOUT = 60 * 60
+
+# Лимиты запросов на запись: (запросов, за секунд) на сессию,
+# а без неё — на IP. С сессией запрос списывается и из корзины IP,
+# которая в RATELIMIT_IP_FACTOR раз больше: новые сессии не обходят
+# лимит. Корзины и счётчики ratelimit_stats лежат в кэше и общие
+# для процессов, только если общий бэкенд кэша
+RATELIMIT_ENABLED = True
+RATELIMITS = {
+    'posts.new_post': (10, 60),
+    'posts.add_comment': (20, 60),
+    'posts.profile_follow': (30, 60),
+    'users.signup': (5, 60 * 60),
+    'posts.export': (10, 60 * 60),
+}
+RATELIMIT_IP_FACTOR = 5
+# Брать IP из X-Forwarded-For только за доверенным прокси
+RATELIMIT_TRUST_FORWARDED = False
+
+# Защита дорогих страниц от перегрузки: выше порогов отдаётся копия
+# из кэша или облегчённая страница, а при ADMISSION_REJECT_IN_FLIGHT
+# параллельных запросах — 503
+ADMISSION_VIEWS = ['posts:follow_index', 'posts:profile']
+ADMISSION_DEGRADE_IN_FLIGHT = 8
+ADMISSION_REJECT_IN_FLIGHT = 32
+# Среднее время работы с базой, секунд. Пока оно выше порога, каждый
+# ADMISSION_PROBE_EVERY-й запрос всё же идёт в базу и обновляет его
+ADMISSION_DEGRADE_DB_TIME = 0.5
+ADMISSION_PROBE_EVERY = 10
+ADMISSION_RETRY_AFTER = 5
+ADMISSION_STALE_TIMEOUT = 60 * 10
+
+# Кэш страниц для анонимных посетителей: маршрут и сколько секунд
+# страница свежая. Ещё RESPONSE_CACHE_STALE секунд после этого
+# отдаётся старая копия, пока фоновый поток рисует новую
+RESPONSE_CACHE_ROUTES = {
+    'posts:index': 20,
+    'posts:group_posts': 60,
+    'posts:profile': 60,
+    'posts:profile_archive': 60,
+    'posts:group_archive': 60,
+    'posts:post': 30,
+}
+RESPONSE_CACHE_STALE = 60 * 10
+# Параметры запроса и заголовки (ключи META), от которых зависит страница
+RESPONSE_CACHE_PARAMS = ['page', 'cursor']
+RESPONSE_CACHE_HEADERS = []
+
+# Посты с большим числом комментариев отдаются потоком,
+# комментарии рендерятся пачками по STREAM_CHUNK_SIZE
+COMMENTS_STREAM_THRESHOLD = 200
+STREAM_CHUNK_SIZE = 50
+
+# Выгрузка данных выбирает строки пачками по EXPORT_BATCH_SIZE
+EXPORT_BATCH_SIZE = 2000
+
+# Мягко удалённые пользователи, посты и комментарии удаляются насовсем
+# командой purge_deleted через SOFT_DELETE_RETENTION секунд,
+# пачками по PURGE_BATCH_SIZE строк на транзакцию
+SOFT_DELETE_RETENTION = 60 * 60 * 24 * 7
+PURGE_BATCH_SIZE = 1000
+
+# История правок хранит разницы между версиями поста и сжатую копию
+# текста каждые POST_REVISION_SNAPSHOT_EVERY версий: любая версия
+# собирается не больше чем из стольких строк
+POST_REVISION_SNAPSHOT_EVERY = 10
+
+# Команда render_texts пересчитывает сохранённый HTML пачками
+RENDER_BATCH_SIZE = 1000
+
+# Сжатие ответов: кодировки в порядке предпочтения (br и zstd —
+# если установлены brotli и zstandard), уровни и минимальный размер
+COMPRESSION_ENCODINGS = ['br', 'zstd', 'gzip']
+COMPRESSION_LEVELS = {'br': 5, 'zstd': 6, 'gzip': 6}
+COMPRESSION_MIN_LENGTH = 200
+
+# Страницы, которые команда prerender заранее пишет на диск вместе
+# со сжатыми вариантами, и сколько самых активных сообществ добавить
+PRERENDER_ROOT = os.path.join(BASE_DIR, 'prerendered')
+PRERENDER_URLS = ['posts:index', 'about:author', 'about:tech']
+PRERENDER_TOP_GROUPS = 5
+PRERENDER_HOST = 'localhost'
+
 """ LOGGING = {
     'version': 1,
     'disable_existing_loggers': True,
@@ -0,0 +1,106 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import (FileResponse, HttpResponseNotAllowed,
+                         HttpResponseNotFound, HttpResponseNotModified)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# Варианты в порядке предпочтения: расширение файла и Content-Encoding
+ENCODINGS = [('.br', 'br'), ('.gz', 'gzip')]
+
+
+def accepted_encodings(request):
+    accepted = set()
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        if re.match(r'^\s*q\s*=\s*0(\.0*)?\s*$', params):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Отдаёт файлы из STATIC_ROOT раньше остальных middleware и
+    URL-резолвера.
+
+    Из нескольких сжатых вариантов файла выбирается лучший, который
+    принимает браузер. FileResponse передаёт открытый файл серверу,
+    и тот отправляет его через wsgi.file_wrapper (sendfile), не читая
+    в память. Файлы с хэшем в имени из манифеста кэшируются
+    браузером навсегда (immutable), остальные — на STATIC_MAX_AGE.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.hashed_names = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, request):
+        if not request.path_info.startswith(self.prefix):
+            return self.get_response(request)
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        name = request.path_info[len(self.prefix):]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return HttpResponseNotFound()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return HttpResponseNotFound()
+        if not os.path.isfile(path):
+            return HttpResponseNotFound()
+
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = self.file_response(request, path)
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if name in self.hashed_names:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, '
+                'immutable'
+            )
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+        return response
+
+    def file_response(self, request, path):
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        variants = [
+            (suffix, coding) for suffix, coding in ENCODINGS
+            if os.path.exists(path + suffix)
+        ]
+        accepted = accepted_encodings(request)
+        for suffix, coding in variants:
+            if coding in accepted:
+                response = FileResponse(
+                    open(path + suffix, 'rb'), content_type=content_type
+                )
+                response['Content-Encoding'] = coding
+                break
+        else:
+            response = FileResponse(open(path, 'rb'),
+                                    content_type=content_type)
+        if variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
@@ -0,0 +1,52 @@
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .compression import precompress
+
+# Файлы этих типов уже сжаты, gzip и brotli их не уменьшат
+COMPRESSED_EXTENSIONS = {
+    '.gz', '.br', '.zst', '.zip', '.png', '.jpg', '.jpeg', '.gif',
+    '.webp', '.woff', '.woff2', '.mp4', '.webm',
+}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Статика с хэшем содержимого в имени файла и заранее сжатыми
+    вариантами .gz и .br рядом с каждым файлом.
+
+    Если collectstatic ещё не запускался и манифеста нет, {% static %}
+    отдаёт исходное имя файла вместо ошибки.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = {}
+        processed = super().post_process(paths, dry_run, **options)
+        for name, hashed_name, post_processed in processed:
+            yield name, hashed_name, post_processed
+            if not isinstance(post_processed, Exception):
+                hashed_names[name] = hashed_name
+        # CSS проходит несколько раз, поэтому сжимаются окончательные
+        # версии после всех проходов
+        for name, hashed_name in hashed_names.items():
+            self.compress(name)
+            if hashed_name:
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        if os.path.splitext(name)[1].lower() in COMPRESSED_EXTENSIONS:
+            return
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            content = f.read()
+        for suffix, compressed in precompress(content).items():
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
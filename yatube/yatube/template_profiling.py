@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.base import Template
+from django.template.loader_tags import IncludeNode
+
+logger = logging.getLogger('yatube.templates')
+
+_local = threading.local()
+_original_template_render = Template.render
+_original_include_render = IncludeNode.render
+
+
+def _record(label, started):
+    timings = getattr(_local, 'timings', None)
+    if timings is not None:
+        timings[label][0] += 1
+        timings[label][1] += time.perf_counter() - started
+
+
+def _profiled_template_render(self, context):
+    started = time.perf_counter()
+    try:
+        return _original_template_render(self, context)
+    finally:
+        _record(f'template:{self.name}', started)
+
+
+def _profiled_include_render(self, context):
+    started = time.perf_counter()
+    try:
+        return _original_include_render(self, context)
+    finally:
+        name = getattr(self.template, 'var', self.template)
+        _record(f'include:{name}', started)
+
+
+def install():
+    Template.render = _profiled_template_render
+    IncludeNode.render = _profiled_include_render
+
+
+class TemplateProfilingMiddleware:
+    """
+    Собирает время рендера каждого шаблона и каждого {% include %}
+    за запрос и отдаёт его в заголовке Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.timings = defaultdict(lambda: [0, 0.0])
+        try:
+            response = self.get_response(request)
+            # TemplateResponse рендерится уже после вызова view
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        finally:
+            timings, _local.timings = _local.timings, None
+
+        entries = sorted(
+            timings.items(), key=lambda item: item[1][1], reverse=True
+        )
+        for label, (calls, seconds) in entries:
+            logger.debug(
+                '%s %s: %d calls, %.2f ms',
+                request.path, label, calls, seconds * 1000
+            )
+        response['Server-Timing'] = ', '.join(
+            f't{index};desc="{label} x{calls}";dur={seconds * 1000:.2f}'
+            for index, (label, (calls, seconds)) in enumerate(entries)
+        )
+        return response
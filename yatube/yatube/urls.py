@@ -1,9 +1,10 @@
 from django.conf import settings
 from django.conf.urls import handler404, handler500
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from .media import serve_media
+
 handler404 = 'posts.views.page_not_found'  # noqa
 handler500 = 'posts.views.server_error'  # noqa
 
@@ -16,16 +17,13 @@ urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
 ]
 
+if settings.MEDIA_SERVE:
+    urlpatterns.insert(0, path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+        serve_media,
+        name='media'
+    ))
 
 if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
-    urlpatterns += static(
-        settings.STATIC_URL,
-        document_root=settings.STATIC_ROOT
-    )
-
     import debug_toolbar
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)